@@ -20,6 +20,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.routers import auth, projects, devices, logs, alarms, enterprises, controllers, hardware, sites, usage, dashboards, ssh_tests
 from app.middleware.audit import AuditLoggingMiddleware
 from app.services.alarm_notifier import start_notifier, stop_notifier
+from app.services.email_service import close_email_client
+from app.services.supabase import supabase_service
 
 
 # ============================================
@@ -85,6 +87,9 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     await stop_notifier()
+    await close_email_client()
+    await ssh_tests.ssh_pool.close()
+    supabase_service.close()
     print("Shutting down API...")
 
 
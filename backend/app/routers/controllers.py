@@ -11,6 +11,7 @@ Handles controller hardware management:
 Accessible by super_admin, backend_admin, and enterprise_admin (for claiming).
 """
 
+import asyncio
 import secrets
 import string
 import uuid
@@ -1147,80 +1148,86 @@ class UpdateResponse(BaseModel):
     output: Optional[str] = None
 
 
-def execute_ssh_command(host: str, port: int, username: str, password: str, command: str, timeout: int = 60) -> tuple[bool, str, str]:
+async def execute_ssh_command(host: str, port: int, username: str, password: str, command: str, timeout: int = 60) -> tuple[bool, str, str]:
     """
     Execute arbitrary command via SSH.
     Returns (success, message, output).
     """
-    import paramiko
+    import asyncssh
 
-    try:
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    connect_timeout = 10
+    # Set once the session is up, so a timeout names the phase that fired
+    connected = False
 
-        client.connect(
-            hostname=host,
+    try:
+        async with asyncssh.connect(
+            host,
             port=port,
             username=username,
             password=password,
-            timeout=10,
-            banner_timeout=10,
-            auth_timeout=10
-        )
-
-        stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
-        exit_code = stdout.channel.recv_exit_status()
-        output = stdout.read().decode('utf-8')
-        error = stderr.read().decode('utf-8')
-
-        client.close()
+            known_hosts=None,
+            client_keys=None,
+            compression_algs=None,
+            connect_timeout=connect_timeout,
+            login_timeout=connect_timeout
+        ) as conn:
+            connected = True
+            result = await conn.run(command, timeout=timeout, check=False, encoding="utf-8")
+
+        exit_code = result.exit_status
+        output = str(result.stdout or "")
+        error = str(result.stderr or "")
 
         # Check exit code - git writes progress to stderr even on success
         if exit_code != 0:
             return False, f"Command failed (exit {exit_code}): {error[:200] or output[:200]}", error or output
         return True, "Command executed successfully", output + (f"\n{error}" if error else "")
 
-    except paramiko.AuthenticationException:
+    except asyncssh.PermissionDenied:
         return False, "SSH authentication failed", ""
-    except paramiko.SSHException as e:
+    except asyncio.TimeoutError:
+        if connected:
+            return False, f"SSH command timed out after {timeout}s", ""
+        return False, f"SSH connection timed out after {connect_timeout}s", ""
+    except asyncssh.Error as e:
         return False, f"SSH error: {str(e)}", ""
     except Exception as e:
         return False, f"Failed to connect: {str(e)}", ""
 
 
-def execute_ssh_reboot(host: str, port: int, username: str, password: str) -> tuple[bool, str]:
+async def execute_ssh_reboot(host: str, port: int, username: str, password: str) -> tuple[bool, str]:
     """
     Execute reboot command via SSH using standard Linux systemctl.
     Systemd handles graceful service shutdown (TimeoutStopSec=30 configured).
     Returns (success, message).
     """
-    import paramiko
+    import asyncssh
 
     try:
-        client = paramiko.SSHClient()
-        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-        client.connect(
-            hostname=host,
+        async with asyncssh.connect(
+            host,
             port=port,
             username=username,
             password=password,
-            timeout=10,
-            banner_timeout=10,
-            auth_timeout=10
-        )
-
-        # Standard Linux reboot - systemd handles graceful service shutdown
-        # All volteria services have TimeoutStopSec=30 configured
-        stdin, stdout, stderr = client.exec_command("sudo systemctl reboot", timeout=10)
-
-        client.close()
+            known_hosts=None,
+            client_keys=None,
+            compression_algs=None,
+            connect_timeout=10,
+            login_timeout=10
+        ) as conn:
+            # Standard Linux reboot - systemd handles graceful service shutdown
+            # All volteria services have TimeoutStopSec=30 configured.
+            # Don't wait for the command to finish - the connection drops.
+            await asyncio.wait_for(conn.create_process("sudo systemctl reboot"), timeout=10)
 
         return True, "Reboot command executed successfully"
 
-    except paramiko.AuthenticationException:
+    except asyncssh.PermissionDenied:
         return False, "SSH authentication failed"
-    except paramiko.SSHException as e:
+    except asyncssh.ConnectionLost:
+        # Connection reset is expected during reboot
+        return True, "Reboot command executed (connection closed as expected)"
+    except asyncssh.Error as e:
         return False, f"SSH error: {str(e)}"
     except Exception as e:
         # Connection reset is expected during reboot
@@ -1349,7 +1356,7 @@ async def reboot_controller(
         # The reverse SSH tunnels listen on localhost of the host, accessible via Docker's host-gateway
         SSH_HOST = "host.docker.internal"
 
-        success, message = execute_ssh_reboot(
+        success, message = await execute_ssh_reboot(
             host=SSH_HOST,
             port=controller["ssh_port"],
             username=controller["ssh_username"],
@@ -1441,7 +1448,7 @@ async def get_logging_stats(
         SSH_HOST = "host.docker.internal"
         command = "curl -s http://localhost:8085/stats"
 
-        success, message, output = execute_ssh_command(
+        success, message, output = await execute_ssh_command(
             host=SSH_HOST,
             port=controller["ssh_port"],
             username=controller["ssh_username"],
@@ -1543,7 +1550,7 @@ async def get_logging_debug(
         SSH_HOST = "host.docker.internal"
         command = "curl -s http://localhost:8085/debug"
 
-        success, message, output = execute_ssh_command(
+        success, message, output = await execute_ssh_command(
             host=SSH_HOST,
             port=controller["ssh_port"],
             username=controller["ssh_username"],
@@ -1643,7 +1650,7 @@ async def get_controller_logs(
 
         # 4. Execute via SSH
         SSH_HOST = "host.docker.internal"
-        success, message, output = execute_ssh_command(
+        success, message, output = await execute_ssh_command(
             host=SSH_HOST,
             port=controller["ssh_port"],
             username=controller.get("ssh_username") or "pi",
@@ -1771,7 +1778,7 @@ fi
 sudo mkdir -p /opt/volteria/backup /opt/volteria/updates /opt/volteria/data /opt/volteria/logs
 sudo chown -R volteria:volteria /opt/volteria/backup /opt/volteria/updates /opt/volteria/data /opt/volteria/logs
 """
-        success, message, output = execute_ssh_command(
+        success, message, output = await execute_ssh_command(
             host=SSH_HOST,
             port=controller["ssh_port"],
             username=controller["ssh_username"],
@@ -1789,7 +1796,7 @@ sudo chown -R volteria:volteria /opt/volteria/backup /opt/volteria/updates /opt/
         git_output = output
 
         # Restart services
-        success, message, output = execute_ssh_command(
+        success, message, output = await execute_ssh_command(
             host=SSH_HOST,
             port=controller["ssh_port"],
             username=controller["ssh_username"],
@@ -1921,7 +1928,7 @@ async def read_registers(
 
         # 5. Execute via SSH
         SSH_HOST = "host.docker.internal"
-        success, message, output = execute_ssh_command(
+        success, message, output = await execute_ssh_command(
             host=SSH_HOST,
             port=controller["ssh_port"],
             username=controller["ssh_username"],
@@ -2034,7 +2041,7 @@ async def write_register(
 
         # 5. Execute via SSH
         SSH_HOST = "host.docker.internal"
-        success, message, output = execute_ssh_command(
+        success, message, output = await execute_ssh_command(
             host=SSH_HOST,
             port=controller["ssh_port"],
             username=controller["ssh_username"],
@@ -2204,7 +2211,7 @@ async def query_local_historical(
 
         # 5. Execute via SSH
         SSH_HOST = "host.docker.internal"
-        success, message, output = execute_ssh_command(
+        success, message, output = await execute_ssh_command(
             host=SSH_HOST,
             port=controller["ssh_port"],
             username=controller["ssh_username"],
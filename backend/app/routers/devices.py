@@ -1455,17 +1455,16 @@ async def change_device_template(
         new_template_uuid = new_template["id"]
 
         # Helper: add source:"template" to all registers and ensure logging_frequency
+        # Mutates in place - template rows are freshly parsed per request and not reused
         def add_template_source(registers):
             if not registers:
                 return []
-            result = []
             for r in registers:
-                reg = {**r, "source": "template"}
+                r["source"] = "template"
                 # Ensure logging_frequency is always set (default: 60 seconds = 1 minute)
-                if "logging_frequency" not in reg or reg.get("logging_frequency") is None:
-                    reg["logging_frequency"] = 60
-                result.append(reg)
-            return result
+                if r.get("logging_frequency") is None:
+                    r["logging_frequency"] = 60
+            return registers
 
         # Helper: filter manual registers from device
         def get_manual_registers(registers):
@@ -16,6 +16,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field
 from supabase import Client
@@ -126,6 +127,11 @@ class SiteSummary(BaseModel):
     is_active: bool
 
 
+class TemplateSyncStatusBatchRequest(BaseModel):
+    """Sites to get template sync status for."""
+    site_ids: list[UUID] = Field(..., max_length=500)
+
+
 # ============================================
 # HELPER FUNCTIONS
 # ============================================
@@ -824,6 +830,119 @@ async def sync_site_config(
 # TEMPLATE SYNC ENDPOINTS
 # ============================================
 
+# Short-lived per-site cache for the sync status endpoint (polled by the UI).
+# Entries are dropped when the site is synced; template edits show up within the TTL.
+_sync_status_cache: TTLCache = TTLCache(maxsize=1024, ttl=5)
+
+# Tagged template registers keyed by (template id, updated_at). Templates are
+# also edited directly through Supabase by the frontend, so entries are
+# validated against the current updated_at instead of being busted on write.
+_template_cache: TTLCache = TTLCache(maxsize=4096, ttl=300)
+
+
+def add_template_source(registers):
+    """
+    Add source:"template" to all registers and ensure logging_frequency.
+
+    Mutates in place - template rows are freshly parsed from the database
+    and only shared (read-only) through _template_cache afterwards.
+    """
+    if not registers:
+        return []
+    for r in registers:
+        r["source"] = "template"
+        # Ensure logging_frequency is always set (default: 60 seconds = 1 minute)
+        if r.get("logging_frequency") is None:
+            r["logging_frequency"] = 60
+    return registers
+
+
+def get_synced_templates(db: Client, template_ids: list[str]) -> dict:
+    """
+    Get tagged template registers for template sync, keyed by template id.
+
+    Only id + updated_at are read on every call; the bulky register JSON is
+    fetched (once, for all stale templates) when the cached copy is missing
+    or older than the template's current updated_at. Devices sharing a
+    template share the same tagged register lists.
+    """
+    if not template_ids:
+        return {}
+
+    versions = db.table("device_templates").select(
+        "id, updated_at"
+    ).in_("id", template_ids).execute()
+
+    templates = {}
+    stale_ids = []
+    for t in versions.data or []:
+        cached = _template_cache.get((t["id"], t["updated_at"]))
+        if cached is not None:
+            templates[t["id"]] = cached
+        else:
+            stale_ids.append(t["id"])
+
+    if stale_ids:
+        templates_result = db.table("device_templates").select(
+            "id, updated_at, logging_registers, visualization_registers, alarm_registers, calculated_fields, registers"
+        ).in_("id", stale_ids).execute()
+
+        for t in templates_result.data or []:
+            template = {
+                "logging": add_template_source(t.get("logging_registers") or t.get("registers") or []),
+                "viz": add_template_source(t.get("visualization_registers") or []),
+                "alarm": add_template_source(t.get("alarm_registers") or []),
+                "calculated_fields": t.get("calculated_fields") or [],
+                "updated_at": t.get("updated_at"),
+            }
+            _template_cache[(t["id"], t["updated_at"])] = template
+            templates[t["id"]] = template
+
+    return templates
+
+
+@router.post("/template-sync-status/batch")
+async def get_template_sync_status_batch(
+    request: TemplateSyncStatusBatchRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: Client = Depends(get_supabase)
+):
+    """
+    Get template sync status for many sites in one call.
+
+    Returns a dict keyed by site_id with the same summary fields as
+    /{site_id}/template-sync-status (without the per-device list).
+    Sites with no enabled devices report zero devices.
+    """
+    try:
+        site_ids = [str(site_id) for site_id in dict.fromkeys(request.site_ids)]
+        if not site_ids:
+            return {}
+
+        # One grouped query for all sites (sites_sync_summary RPC)
+        result = db.rpc("sites_sync_summary", {"p_site_ids": site_ids}).execute()
+        rows = {row["site_id"]: row for row in result.data or []}
+
+        statuses = {}
+        for site_id in site_ids:
+            row = rows.get(site_id, {})
+            devices_needing_sync = row.get("devices_needing_sync", 0)
+            statuses[site_id] = {
+                "last_config_update": row.get("last_config_update"),
+                "last_sync": row.get("last_sync"),
+                "needs_sync": devices_needing_sync > 0,
+                "total_devices": row.get("total_devices", 0),
+                "devices_needing_sync": devices_needing_sync
+            }
+
+        return statuses
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get sync status: {str(e)}"
+        )
+
+
 @router.get("/{site_id}/template-sync-status")
 async def get_template_sync_status(
     site_id: UUID,
@@ -839,13 +958,17 @@ async def get_template_sync_status(
     - needs_sync: True if any device's template was updated after last sync
     - devices: List of devices with their individual sync status
     """
-    try:
-        # Get all devices in the site with their template info
-        devices_result = db.table("site_devices").select(
-            "id, name, template_id, template_synced_at"
-        ).eq("site_id", str(site_id)).eq("enabled", True).execute()
+    cached = _sync_status_cache.get(site_id)
+    if cached is not None:
+        return cached
 
-        if not devices_result.data:
+    try:
+        # Aggregates and per-device rows computed in SQL (site_sync_summary RPC)
+        summary_result = db.rpc("site_sync_summary", {"p_site_id": str(site_id)}).execute()
+        data = summary_result.data
+        summary = data[0] if isinstance(data, list) and data else (data or {})
+        if not isinstance(summary, dict) or not summary:
+            # No summary row (site has no devices or doesn't exist) - nothing to sync
             return {
                 "last_config_update": None,
                 "last_sync": None,
@@ -855,74 +978,16 @@ async def get_template_sync_status(
                 "devices_needing_sync": 0
             }
 
-        # Get all unique template IDs
-        template_ids = list(set(
-            d["template_id"] for d in devices_result.data
-            if d.get("template_id")
-        ))
-
-        # Fetch template update timestamps
-        templates_map = {}
-        if template_ids:
-            templates_result = db.table("device_templates").select(
-                "id, updated_at, name"
-            ).in_("id", template_ids).execute()
-
-            templates_map = {
-                t["id"]: t for t in templates_result.data
-            } if templates_result.data else {}
-
-        # Build device sync status list
-        devices_status = []
-        last_config_update = None
-        last_sync = None
-        devices_needing_sync = 0
-
-        for device in devices_result.data:
-            template_id = device.get("template_id")
-            template = templates_map.get(template_id) if template_id else None
-
-            device_sync_at = device.get("template_synced_at")
-            template_updated_at = template.get("updated_at") if template else None
-
-            # Determine if this device needs sync
-            device_needs_sync = False
-            if template_id and template_updated_at:
-                if not device_sync_at:
-                    device_needs_sync = True
-                elif device_sync_at < template_updated_at:
-                    device_needs_sync = True
-
-            if device_needs_sync:
-                devices_needing_sync += 1
-
-            # Track global timestamps
-            if template_updated_at:
-                if not last_config_update or template_updated_at > last_config_update:
-                    last_config_update = template_updated_at
-
-            if device_sync_at:
-                if not last_sync or device_sync_at < last_sync:
-                    last_sync = device_sync_at
-
-            devices_status.append({
-                "id": device["id"],
-                "name": device["name"],
-                "template_id": template_id,
-                "template_name": template.get("name") if template else None,
-                "template_synced_at": device_sync_at,
-                "template_updated_at": template_updated_at,
-                "needs_sync": device_needs_sync
-            })
-
-        return {
-            "last_config_update": last_config_update,
-            "last_sync": last_sync,
-            "needs_sync": devices_needing_sync > 0,
-            "devices": devices_status,
-            "total_devices": len(devices_result.data),
-            "devices_needing_sync": devices_needing_sync
+        sync_status = {
+            "last_config_update": summary.get("last_config_update"),
+            "last_sync": summary.get("last_sync"),
+            "needs_sync": bool(summary.get("needs_sync")),
+            "devices": summary.get("devices") or [],
+            "total_devices": summary.get("total_devices", 0),
+            "devices_needing_sync": summary.get("devices_needing_sync", 0)
         }
+        _sync_status_cache[site_id] = sync_status
+        return sync_status
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -947,12 +1012,16 @@ async def sync_site_templates(
     Calculated fields are freely editable at device level, so they're only synced
     if the device has no calculated fields yet.
 
-    Returns count of synced devices and timestamp.
+    Devices already synced after their template's last update are skipped.
+
+    Returns count of synced/skipped devices and timestamp.
     """
     try:
         # Get all devices in site that have a template_id
-        devices_result = db.table("site_devices").select(
-            "id, template_id, registers, visualization_registers, alarm_registers, calculated_fields"
+        # (view returns only the manual registers - template ones get replaced anyway)
+        devices_result = db.table("site_devices_manual_registers").select(
+            "id, template_id, template_synced_at, manual_registers, "
+            "manual_visualization_registers, manual_alarm_registers, has_calculated_fields"
         ).eq("site_id", str(site_id)).eq("enabled", True).not_.is_("template_id", "null").execute()
 
         if not devices_result.data:
@@ -963,55 +1032,45 @@ async def sync_site_templates(
             }
 
         synced_count = 0
+        skipped_count = 0
         errors = []
 
-        # Helper: add source:"template" to all registers and ensure logging_frequency
-        def add_template_source(registers):
-            if not registers:
-                return []
-            result = []
-            for r in registers:
-                reg = {**r, "source": "template"}
-                # Ensure logging_frequency is always set (default: 60 seconds = 1 minute)
-                if "logging_frequency" not in reg or reg.get("logging_frequency") is None:
-                    reg["logging_frequency"] = 60
-                result.append(reg)
-            return result
-
-        # Helper: filter manual registers from device
-        def get_manual_registers(registers):
-            if not registers:
-                return []
-            return [r for r in registers if r.get("source") == "manual"]
+        # Helper: device already synced after the template's last update
+        def is_up_to_date(device, template):
+            synced_at = device.get("template_synced_at")
+            updated_at = template["updated_at"]
+            if not synced_at or not updated_at:
+                return False
+            # Calculated fields are still copied to devices that have none
+            if not device.get("has_calculated_fields") and template["calculated_fields"]:
+                return False
+            return datetime.fromisoformat(synced_at) >= datetime.fromisoformat(updated_at)
+
+        # Tagged template registers for every template used in the site
+        template_ids = list({d["template_id"] for d in devices_result.data})
+        transformed = get_synced_templates(db, template_ids)
 
         for device in devices_result.data:
             try:
-                # Get template data
                 print(f"[SYNC] Syncing device {device['id']} with template_id {device['template_id']}")
-                template_result = db.table("device_templates").select(
-                    "logging_registers, visualization_registers, alarm_registers, calculated_fields, registers"
-                ).eq("id", device["template_id"]).single().execute()
+                template = transformed.get(device["template_id"])
 
-                if template_result.data:
-                    print(f"[SYNC] Found template with {len(template_result.data.get('logging_registers') or template_result.data.get('registers') or [])} logging registers")
-                    template = template_result.data
+                if template and is_up_to_date(device, template):
+                    # Nothing changed since the last sync - skip the update round-trip
+                    print(f"[SYNC] Device {device['id']} already in sync, skipping")
+                    skipped_count += 1
+                elif template:
+                    print(f"[SYNC] Found template with {len(template['logging'])} logging registers")
 
                     # Get manual registers to preserve
-                    manual_logging = get_manual_registers(device.get("registers"))
-                    manual_viz = get_manual_registers(device.get("visualization_registers"))
-                    manual_alarm = get_manual_registers(device.get("alarm_registers"))
-
-                    # Get fresh template registers with source:"template"
-                    template_logging = add_template_source(
-                        template.get("logging_registers") or template.get("registers") or []
-                    )
-                    template_viz = add_template_source(template.get("visualization_registers") or [])
-                    template_alarm = add_template_source(template.get("alarm_registers") or [])
-
-                    # Merge: template registers + manual registers
-                    merged_logging = template_logging + manual_logging
-                    merged_viz = template_viz + manual_viz
-                    merged_alarm = template_alarm + manual_alarm
+                    manual_logging = device.get("manual_registers") or []
+                    manual_viz = device.get("manual_visualization_registers") or []
+                    manual_alarm = device.get("manual_alarm_registers") or []
+
+                    # Merge: template registers + manual registers (concatenation gives each device its own list)
+                    merged_logging = template["logging"] + manual_logging
+                    merged_viz = template["viz"] + manual_viz
+                    merged_alarm = template["alarm"] + manual_alarm
 
                     # Build update data
                     update_data = {
@@ -1022,8 +1081,8 @@ async def sync_site_templates(
                     }
 
                     # Only sync calculated_fields if device has none (freely editable)
-                    if not device.get("calculated_fields"):
-                        update_data["calculated_fields"] = template.get("calculated_fields") or []
+                    if not device.get("has_calculated_fields"):
+                        update_data["calculated_fields"] = template["calculated_fields"]
 
                     db.table("site_devices").update(update_data).eq("id", device["id"]).execute()
                     print(f"[SYNC] Successfully updated device {device['id']} with {len(merged_logging)} logging, {len(merged_viz)} viz, {len(merged_alarm)} alarm registers")
@@ -1038,8 +1097,12 @@ async def sync_site_templates(
                     "error": str(device_error)
                 })
 
+        # Sync timestamps changed - next status poll must hit the database
+        _sync_status_cache.pop(site_id, None)
+
         result = {
             "synced_devices": synced_count,
+            "skipped_devices": skipped_count,
             "synced_at": datetime.utcnow().isoformat(),
             "total_devices": len(devices_result.data)
         }
@@ -11,11 +11,18 @@ Handles data usage and storage analytics:
 For billing, storage management, and enterprise capacity planning.
 """
 
-from datetime import date, timedelta
+import asyncio
+import hashlib
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
 from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from postgrest.exceptions import APIError
 from pydantic import BaseModel, Field
 from supabase import Client
 
@@ -25,7 +32,17 @@ from app.dependencies.auth import (
     require_role,
 )
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Packages change rarely (edited from the admin UI through Supabase), so the
+# full table is cached briefly instead of re-fetched on every admin request.
+_packages_cache: TTLCache = TTLCache(maxsize=1, ttl=60)
+
+# All-enterprise recalculation jobs are tracked in usage_recalc_jobs
+# (migration 126) so any worker can answer GET /calculate/{job_id}. A job
+# still queued/running after this long is treated as abandoned (e.g. the
+# worker running it restarted) so it can't block new recalculations.
+RECALC_JOB_STALE_AFTER = timedelta(hours=1)
 
 
 # ============================================
@@ -122,26 +139,153 @@ class RecalculateResponse(BaseModel):
     success: bool
     enterprises_updated: int
     message: str
+    job_id: Optional[str] = None  # Set for queued all-enterprise recalculations
+
+
+class RecalculateJobResponse(BaseModel):
+    """Status of a queued all-enterprise recalculation."""
+    job_id: str
+    status: str  # queued, running, completed, failed
+    enterprises_updated: int
+    error: Optional[str] = None
 
 
 # ============================================
 # HELPER FUNCTIONS
 # ============================================
 
+_BYTES_PER_GB = 1.0 / (1 << 30)
+
+
 def bytes_to_gb(bytes_val: int) -> float:
     """Convert bytes to GB with 2 decimal places."""
-    return round(bytes_val / (1024 ** 3), 2)
+    return round(bytes_val * _BYTES_PER_GB, 2)
+
+
+# Warning level boundaries (usage %): 80+ approaching, 100+ exceeded, 110+ critical
+_WARNING_THRESHOLDS = (80.0, 100.0, 110.0)
+_WARNING_LEVELS = ("normal", "approaching", "exceeded", "critical")
 
 
 def calculate_warning_level(usage_percent: float) -> str:
     """Determine warning level from usage percentage."""
-    if usage_percent >= 110:
-        return "critical"
-    elif usage_percent >= 100:
-        return "exceeded"
-    elif usage_percent >= 80:
-        return "approaching"
-    return "normal"
+    return _WARNING_LEVELS[bisect_right(_WARNING_THRESHOLDS, usage_percent)]
+
+
+def _build_enterprise_usage(enterprise: dict, package: Optional[dict], snapshot: dict) -> EnterpriseUsageResponse:
+    """
+    Build the usage response for one enterprise from its row, package and snapshot.
+
+    Uses model_construct - every field is set here from DB rows, so the
+    Pydantic validation pass in __init__ is skipped.
+    """
+    limit_bytes = package["storage_limit_bytes"] if package else None
+
+    if not snapshot:
+        # No snapshot yet (e.g. new enterprise) - every usage figure is zero
+        return EnterpriseUsageResponse.model_construct(
+            enterprise_id=str(enterprise["id"]),
+            enterprise_name=enterprise["name"],
+            package_id=str(enterprise.get("usage_package_id")) if enterprise.get("usage_package_id") else None,
+            package_name=package["name"] if package else None,
+            storage_limit_bytes=limit_bytes,
+            storage_limit_gb=bytes_to_gb(limit_bytes) if limit_bytes else None,
+            total_storage_bytes=0,
+            total_storage_gb=0.0,
+            storage_usage_percent=0.0,
+            control_logs_bytes=0,
+            control_logs_rows=0,
+            alarms_bytes=0,
+            alarms_rows=0,
+            heartbeats_bytes=0,
+            audit_logs_bytes=0,
+            sites_count=0,
+            controllers_count=0,
+            users_count=0,
+            warning_level="normal",
+            grace_period_start=enterprise.get("usage_grace_period_start"),
+            snapshot_date=None
+        )
+
+    total_bytes = snapshot.get("total_storage_bytes", 0)
+    usage_percent = (total_bytes / limit_bytes * 100) if limit_bytes else 0
+
+    return EnterpriseUsageResponse.model_construct(
+        enterprise_id=str(enterprise["id"]),
+        enterprise_name=enterprise["name"],
+        package_id=str(enterprise.get("usage_package_id")) if enterprise.get("usage_package_id") else None,
+        package_name=package["name"] if package else None,
+        storage_limit_bytes=limit_bytes,
+        storage_limit_gb=bytes_to_gb(limit_bytes) if limit_bytes else None,
+        total_storage_bytes=total_bytes,
+        total_storage_gb=bytes_to_gb(total_bytes),
+        storage_usage_percent=round(usage_percent, 1),
+        control_logs_bytes=snapshot.get("control_logs_bytes", 0),
+        control_logs_rows=snapshot.get("control_logs_rows", 0),
+        alarms_bytes=snapshot.get("alarms_bytes", 0),
+        alarms_rows=snapshot.get("alarms_rows", 0),
+        heartbeats_bytes=snapshot.get("heartbeats_bytes", 0),
+        audit_logs_bytes=snapshot.get("audit_logs_bytes", 0),
+        sites_count=snapshot.get("sites_count", 0),
+        controllers_count=snapshot.get("controllers_count", 0),
+        users_count=snapshot.get("users_count", 0),
+        warning_level=calculate_warning_level(usage_percent),
+        grace_period_start=enterprise.get("usage_grace_period_start"),
+        snapshot_date=snapshot.get("snapshot_date")
+    )
+
+
+def _snapshot_response(row: dict) -> UsageSnapshotResponse:
+    """Build a history entry from an enterprise_usage_snapshots row (NULL counts as 0)."""
+    total_bytes = row.get("total_storage_bytes") or 0
+    return UsageSnapshotResponse(
+        snapshot_date=row["snapshot_date"],
+        total_storage_bytes=total_bytes,
+        total_storage_gb=bytes_to_gb(total_bytes),
+        storage_usage_percent=row.get("storage_usage_percent") or 0,
+        control_logs_bytes=row.get("control_logs_bytes") or 0,
+        alarms_bytes=row.get("alarms_bytes") or 0,
+        sites_count=row.get("sites_count") or 0,
+        controllers_count=row.get("controllers_count") or 0
+    )
+
+
+def _get_packages(db: Client) -> list[dict]:
+    """All usage packages ordered by display_order, cached for 60s."""
+    packages = _packages_cache.get("all")
+    if packages is None:
+        packages = db.table("usage_packages").select("*").order("display_order").execute().data
+        _packages_cache["all"] = packages
+    return packages
+
+
+def _get_packages_map(db: Client) -> dict[str, dict]:
+    """Usage packages keyed by id."""
+    return {str(p["id"]): p for p in _get_packages(db)}
+
+
+def _set_cache_headers(request: Request, response: Response, body) -> bool:
+    """
+    Set ETag/Cache-Control for a polled dashboard response.
+
+    Returns True when the client's If-None-Match already matches, in which
+    case the caller should answer 304 via _not_modified().
+    """
+    etag = f'"{hashlib.md5(orjson.dumps(body)).hexdigest()}"'
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, max-age=60"
+    return request.headers.get("if-none-match") == etag
+
+
+def _not_modified(response: Response) -> Response:
+    """304 carrying the cache headers already set on `response`."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={
+            "ETag": response.headers["ETag"],
+            "Cache-Control": response.headers["Cache-Control"],
+        },
+    )
 
 
 # ============================================
@@ -160,16 +304,8 @@ async def list_packages(
     Super/backend admins only.
     """
     try:
-        query = db.table("usage_packages").select("*")
-
-        if not include_inactive:
-            query = query.eq("is_active", True)
-
-        result = query.order("display_order").execute()
-
-        packages = []
-        for row in result.data:
-            packages.append(UsagePackageResponse(
+        return [
+            UsagePackageResponse(
                 id=str(row["id"]),
                 name=row["name"],
                 description=row.get("description"),
@@ -181,9 +317,10 @@ async def list_packages(
                 max_users=row.get("max_users"),
                 price_monthly=float(row["price_monthly"]) if row.get("price_monthly") else None,
                 is_active=row.get("is_active", True)
-            ))
-
-        return packages
+            )
+            for row in _get_packages(db)
+            if include_inactive or row.get("is_active", True)
+        ]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -197,6 +334,8 @@ async def list_packages(
 
 @router.get("/summary", response_model=UsageSummaryResponse)
 async def get_usage_summary(
+    request: Request,
+    response: Response,
     current_user: CurrentUser = Depends(require_role(["super_admin", "backend_admin"])),
     db: Client = Depends(get_supabase)
 ):
@@ -207,52 +346,38 @@ async def get_usage_summary(
     Super/backend admins only.
     """
     try:
-        # Get all enterprises
-        enterprises_result = db.table("enterprises").select("id, is_active").execute()
-        total_enterprises = len(enterprises_result.data)
-        active_enterprises = len([e for e in enterprises_result.data if e.get("is_active", True)])
-
-        # Get latest snapshots for all enterprises
         today = date.today()
-        latest_snapshots = db.table("enterprise_usage_snapshots") \
-            .select("*") \
-            .eq("snapshot_date", today.isoformat()) \
-            .execute()
-
-        # Calculate totals
-        total_storage = sum(s.get("total_storage_bytes", 0) for s in latest_snapshots.data)
-
-        # Get snapshots from 30 days ago for growth calculation
         month_ago = today - timedelta(days=30)
-        old_snapshots = db.table("enterprise_usage_snapshots") \
-            .select("total_storage_bytes") \
-            .eq("snapshot_date", month_ago.isoformat()) \
-            .execute()
 
-        old_storage = sum(s.get("total_storage_bytes", 0) for s in old_snapshots.data)
+        # Counts, storage totals and warning buckets are aggregated in Postgres
+        result = db.rpc("get_usage_summary", {
+            "d_today": today.isoformat(),
+            "d_month_ago": month_ago.isoformat()
+        }).execute()
+        summary = result.data[0]
+
+        total_storage = summary["total_storage"]
+        old_storage = summary["old_storage"]
         storage_growth = total_storage - old_storage
         growth_percent = (storage_growth / old_storage * 100) if old_storage > 0 else 0
 
-        # Count warning levels
-        warning_counts = {"normal": 0, "approaching": 0, "exceeded": 0, "critical": 0}
-        for snapshot in latest_snapshots.data:
-            usage_percent = snapshot.get("storage_usage_percent", 0) or 0
-            level = calculate_warning_level(usage_percent)
-            warning_counts[level] += 1
-
-        return UsageSummaryResponse(
-            total_enterprises=total_enterprises,
-            active_enterprises=active_enterprises,
+        usage_summary = UsageSummaryResponse(
+            total_enterprises=summary["total_enterprises"],
+            active_enterprises=summary["active_enterprises"],
             total_storage_bytes=total_storage,
             total_storage_gb=bytes_to_gb(total_storage),
             storage_growth_bytes=storage_growth,
             storage_growth_gb=bytes_to_gb(storage_growth),
             storage_growth_percent=round(growth_percent, 1),
-            enterprises_normal=warning_counts["normal"],
-            enterprises_approaching=warning_counts["approaching"],
-            enterprises_exceeded=warning_counts["exceeded"],
-            enterprises_critical=warning_counts["critical"]
+            enterprises_normal=summary["normal"],
+            enterprises_approaching=summary["approaching"],
+            enterprises_exceeded=summary["exceeded"],
+            enterprises_critical=summary["critical"]
         )
+
+        if _set_cache_headers(request, response, usage_summary.model_dump(mode="json")):
+            return _not_modified(response)
+        return usage_summary
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -264,8 +389,77 @@ async def get_usage_summary(
 # ENDPOINTS - ENTERPRISE USAGE
 # ============================================
 
+def _enterprise_usage_from_row(row: dict) -> EnterpriseUsageResponse:
+    """
+    Build the usage response from a list_enterprise_usage RPC row.
+
+    The row joins enterprise, package and snapshot columns; it is split back
+    into those parts so _build_enterprise_usage stays the one mapping to
+    EnterpriseUsageResponse (its usage % and warning level match the RPC's).
+    """
+    enterprise = {
+        "id": row["enterprise_id"],
+        "name": row["enterprise_name"],
+        "usage_package_id": row.get("usage_package_id"),
+        "usage_grace_period_start": row.get("usage_grace_period_start"),
+    }
+    package = {
+        "name": row.get("package_name"),
+        "storage_limit_bytes": row.get("storage_limit_bytes"),
+    } if row.get("usage_package_id") else None
+    # snapshot_date is NULL when the enterprise has no snapshot for the date
+    snapshot = row if row.get("snapshot_date") else {}
+    return _build_enterprise_usage(enterprise, package, snapshot)
+
+
+def _list_enterprise_usage_at_level(db: Client, warning_level: str, today: date) -> list[EnterpriseUsageResponse]:
+    """Usage for active enterprises at one warning level (filtered list_enterprise_usage)."""
+    # Join and threshold in Postgres so only matching enterprises come back
+    result = db.rpc("list_enterprise_usage", {
+        "p_warning_level": warning_level,
+        "p_date": today.isoformat()
+    }).execute()
+
+    return [_enterprise_usage_from_row(row) for row in result.data]
+
+
+async def _list_all_enterprise_usage(db: Client, today: date) -> list[EnterpriseUsageResponse]:
+    """Usage for every active enterprise (unfiltered list_enterprise_usage)."""
+    # Enterprises, packages and today's snapshots are independent -
+    # fetch them concurrently (the Supabase client is sync)
+    enterprises_result, packages_map, snapshots_result = await asyncio.gather(
+        asyncio.to_thread(
+            lambda: db.table("enterprises")
+            .select("id, name, usage_package_id, usage_warning_level, usage_grace_period_start")
+            .eq("is_active", True)
+            .order("name")
+            .execute()
+        ),
+        asyncio.to_thread(_get_packages_map, db),
+        asyncio.to_thread(
+            lambda: db.table("enterprise_usage_snapshots")
+            .select("*")
+            .eq("snapshot_date", today.isoformat())
+            .execute()
+        ),
+    )
+
+    snapshots_map = {str(s["enterprise_id"]): s for s in snapshots_result.data}
+
+    return [
+        _build_enterprise_usage(
+            enterprise,
+            packages_map.get(str(enterprise["usage_package_id"])) if enterprise.get("usage_package_id") else None,
+            snapshots_map.get(str(enterprise["id"]), {}),
+        )
+        for enterprise in enterprises_result.data
+    ]
+
+
 @router.get("/enterprises", response_model=list[EnterpriseUsageResponse])
 async def list_enterprise_usage(
+    request: Request,
+    response: Response,
     warning_level: Optional[str] = Query(None, description="Filter by warning level"),
     current_user: CurrentUser = Depends(require_role(["super_admin", "backend_admin"])),
     db: Client = Depends(get_supabase)
@@ -277,67 +471,15 @@ async def list_enterprise_usage(
     Super/backend admins only.
     """
     try:
-        # Get all active enterprises with their packages
-        enterprises_result = db.table("enterprises") \
-            .select("id, name, usage_package_id, usage_warning_level, usage_grace_period_start") \
-            .eq("is_active", True) \
-            .order("name") \
-            .execute()
-
-        # Get packages for lookup
-        packages_result = db.table("usage_packages").select("*").execute()
-        packages_map = {str(p["id"]): p for p in packages_result.data}
-
-        # Get latest snapshots
         today = date.today()
-        snapshots_result = db.table("enterprise_usage_snapshots") \
-            .select("*") \
-            .eq("snapshot_date", today.isoformat()) \
-            .execute()
 
-        snapshots_map = {str(s["enterprise_id"]): s for s in snapshots_result.data}
-
-        usage_list = []
-        for enterprise in enterprises_result.data:
-            ent_id = str(enterprise["id"])
-            snapshot = snapshots_map.get(ent_id, {})
-            package = packages_map.get(str(enterprise.get("usage_package_id"))) if enterprise.get("usage_package_id") else None
-
-            # Calculate usage percent
-            total_bytes = snapshot.get("total_storage_bytes", 0)
-            limit_bytes = package["storage_limit_bytes"] if package else None
-            usage_percent = (total_bytes / limit_bytes * 100) if limit_bytes else 0
-
-            level = calculate_warning_level(usage_percent)
-
-            # Filter by warning level if specified
-            if warning_level and level != warning_level:
-                continue
-
-            usage_list.append(EnterpriseUsageResponse(
-                enterprise_id=ent_id,
-                enterprise_name=enterprise["name"],
-                package_id=str(enterprise.get("usage_package_id")) if enterprise.get("usage_package_id") else None,
-                package_name=package["name"] if package else None,
-                storage_limit_bytes=limit_bytes,
-                storage_limit_gb=bytes_to_gb(limit_bytes) if limit_bytes else None,
-                total_storage_bytes=total_bytes,
-                total_storage_gb=bytes_to_gb(total_bytes),
-                storage_usage_percent=round(usage_percent, 1),
-                control_logs_bytes=snapshot.get("control_logs_bytes", 0),
-                control_logs_rows=snapshot.get("control_logs_rows", 0),
-                alarms_bytes=snapshot.get("alarms_bytes", 0),
-                alarms_rows=snapshot.get("alarms_rows", 0),
-                heartbeats_bytes=snapshot.get("heartbeats_bytes", 0),
-                audit_logs_bytes=snapshot.get("audit_logs_bytes", 0),
-                sites_count=snapshot.get("sites_count", 0),
-                controllers_count=snapshot.get("controllers_count", 0),
-                users_count=snapshot.get("users_count", 0),
-                warning_level=level,
-                grace_period_start=enterprise.get("usage_grace_period_start"),
-                snapshot_date=snapshot.get("snapshot_date")
-            ))
+        if warning_level:
+            usage_list = _list_enterprise_usage_at_level(db, warning_level, today)
+        else:
+            usage_list = await _list_all_enterprise_usage(db, today)
 
+        if _set_cache_headers(request, response, [u.model_dump(mode="json") for u in usage_list]):
+            return _not_modified(response)
         return usage_list
     except Exception as e:
         raise HTTPException(
@@ -403,34 +545,7 @@ async def get_enterprise_usage(
 
         snapshot = snapshot_result.data[0] if snapshot_result.data else {}
 
-        # Calculate usage
-        total_bytes = snapshot.get("total_storage_bytes", 0)
-        limit_bytes = package["storage_limit_bytes"] if package else None
-        usage_percent = (total_bytes / limit_bytes * 100) if limit_bytes else 0
-
-        return EnterpriseUsageResponse(
-            enterprise_id=str(enterprise["id"]),
-            enterprise_name=enterprise["name"],
-            package_id=str(enterprise.get("usage_package_id")) if enterprise.get("usage_package_id") else None,
-            package_name=package["name"] if package else None,
-            storage_limit_bytes=limit_bytes,
-            storage_limit_gb=bytes_to_gb(limit_bytes) if limit_bytes else None,
-            total_storage_bytes=total_bytes,
-            total_storage_gb=bytes_to_gb(total_bytes),
-            storage_usage_percent=round(usage_percent, 1),
-            control_logs_bytes=snapshot.get("control_logs_bytes", 0),
-            control_logs_rows=snapshot.get("control_logs_rows", 0),
-            alarms_bytes=snapshot.get("alarms_bytes", 0),
-            alarms_rows=snapshot.get("alarms_rows", 0),
-            heartbeats_bytes=snapshot.get("heartbeats_bytes", 0),
-            audit_logs_bytes=snapshot.get("audit_logs_bytes", 0),
-            sites_count=snapshot.get("sites_count", 0),
-            controllers_count=snapshot.get("controllers_count", 0),
-            users_count=snapshot.get("users_count", 0),
-            warning_level=calculate_warning_level(usage_percent),
-            grace_period_start=enterprise.get("usage_grace_period_start"),
-            snapshot_date=snapshot.get("snapshot_date")
-        )
+        return _build_enterprise_usage(enterprise, package, snapshot)
     except HTTPException:
         raise
     except Exception as e:
@@ -486,19 +601,7 @@ async def get_enterprise_usage_history(
             .order("snapshot_date") \
             .execute()
 
-        return [
-            UsageSnapshotResponse(
-                snapshot_date=row["snapshot_date"],
-                total_storage_bytes=row.get("total_storage_bytes", 0),
-                total_storage_gb=bytes_to_gb(row.get("total_storage_bytes", 0)),
-                storage_usage_percent=row.get("storage_usage_percent", 0) or 0,
-                control_logs_bytes=row.get("control_logs_bytes", 0),
-                alarms_bytes=row.get("alarms_bytes", 0),
-                sites_count=row.get("sites_count", 0),
-                controllers_count=row.get("controllers_count", 0)
-            )
-            for row in result.data
-        ]
+        return [_snapshot_response(row) for row in result.data]
     except HTTPException:
         raise
     except Exception as e:
@@ -512,8 +615,63 @@ async def get_enterprise_usage_history(
 # ENDPOINTS - RECALCULATION
 # ============================================
 
+_RECALC_JOB_COLUMNS = "id, status, enterprises_updated, error"
+
+
+def _recalc_job_response(job: dict) -> RecalculateJobResponse:
+    """Build the job status response from a usage_recalc_jobs row."""
+    return RecalculateJobResponse(
+        job_id=str(job["id"]),
+        status=job["status"],
+        enterprises_updated=job.get("enterprises_updated") or 0,
+        error=job.get("error")
+    )
+
+
+def _get_active_recalc_job(db: Client) -> Optional[dict]:
+    """The queued/running recalculation job, if any."""
+    result = db.table("usage_recalc_jobs") \
+        .select(_RECALC_JOB_COLUMNS) \
+        .in_("status", ["queued", "running"]) \
+        .limit(1) \
+        .execute()
+    return result.data[0] if result.data else None
+
+
+def _run_recalc_all(db: Client, job_id: str):
+    """Background job: snapshot usage for all enterprises and record the outcome."""
+    jobs = db.table("usage_recalc_jobs")
+    try:
+        jobs.update({
+            "status": "running",
+            "started_at": datetime.now(timezone.utc).isoformat()
+        }).eq("id", job_id).execute()
+
+        result = db.rpc("create_all_usage_snapshots", {
+            "p_date": date.today().isoformat()
+        }).execute()
+
+        jobs.update({
+            "status": "completed",
+            "enterprises_updated": result.data if result.data else 0,
+            "completed_at": datetime.now(timezone.utc).isoformat()
+        }).eq("id", job_id).execute()
+    except Exception as e:
+        print(f"[Usage] Recalculation job {job_id} failed: {e}")
+        try:
+            jobs.update({
+                "status": "failed",
+                "error": str(e),
+                "completed_at": datetime.now(timezone.utc).isoformat()
+            }).eq("id", job_id).execute()
+        except Exception as update_error:
+            print(f"[Usage] Failed to record failure of job {job_id}: {update_error}")
+
+
 @router.post("/calculate", response_model=RecalculateResponse)
 async def recalculate_usage(
+    response: Response,
+    background_tasks: BackgroundTasks,
     enterprise_id: Optional[UUID] = Query(None, description="Specific enterprise to recalculate"),
     current_user: CurrentUser = Depends(require_role(["super_admin"])),
     db: Client = Depends(get_supabase)
@@ -522,7 +680,8 @@ async def recalculate_usage(
     Trigger usage recalculation.
 
     If enterprise_id is provided, only recalculate for that enterprise.
-    Otherwise, recalculate for all active enterprises.
+    Otherwise, queue a recalculation for all active enterprises and return
+    202 with a job_id to poll via GET /calculate/{job_id}.
 
     Super admin only.
     """
@@ -540,20 +699,87 @@ async def recalculate_usage(
                 message=f"Usage recalculated for enterprise {enterprise_id}"
             )
         else:
-            # Recalculate for all enterprises
-            result = db.rpc("create_all_usage_snapshots", {
-                "p_date": date.today().isoformat()
-            }).execute()
-
-            count = result.data if result.data else 0
-
+            # Recalculate for all enterprises in the background (can take
+            # minutes); reuse a job that is still queued/running
+            response.status_code = status.HTTP_202_ACCEPTED
+
+            # Release jobs abandoned by a worker that died mid-run
+            stale_before = datetime.now(timezone.utc) - RECALC_JOB_STALE_AFTER
+            db.table("usage_recalc_jobs").update({
+                "status": "failed",
+                "error": "Abandoned (unfinished after the stale timeout)",
+                "completed_at": datetime.now(timezone.utc).isoformat()
+            }).in_("status", ["queued", "running"]).lt(
+                "created_at", stale_before.isoformat()
+            ).execute()
+
+            job = _get_active_recalc_job(db)
+            if job is None:
+                try:
+                    insert_result = db.table("usage_recalc_jobs").insert({
+                        "status": "queued",
+                        "created_by": current_user.id
+                    }).execute()
+                except APIError as e:
+                    # Another worker queued one between the check and the
+                    # insert (one-active-job unique index) - report that job
+                    if e.code != "23505":
+                        raise
+                    job = _get_active_recalc_job(db)
+                    if job is None:
+                        raise
+                else:
+                    job_id = str(insert_result.data[0]["id"])
+                    background_tasks.add_task(_run_recalc_all, db, job_id)
+
+                    return RecalculateResponse(
+                        success=True,
+                        enterprises_updated=0,
+                        message=f"Recalculation job {job_id} queued",
+                        job_id=job_id
+                    )
+
+            # Reuse the job that is still queued/running
             return RecalculateResponse(
                 success=True,
-                enterprises_updated=count,
-                message=f"Usage recalculated for {count} enterprises"
+                enterprises_updated=0,
+                message=f"Recalculation job {job['id']} already {job['status']}",
+                job_id=str(job["id"])
             )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to recalculate usage: {str(e)}"
         )
+
+
+@router.get("/calculate/{job_id}", response_model=RecalculateJobResponse)
+async def get_recalculation_job(
+    job_id: UUID,
+    current_user: CurrentUser = Depends(require_role(["super_admin"])),
+    db: Client = Depends(get_supabase)
+):
+    """
+    Get the status of a queued all-enterprise recalculation.
+
+    Super admin only.
+    """
+    try:
+        result = db.table("usage_recalc_jobs") \
+            .select(_RECALC_JOB_COLUMNS) \
+            .eq("id", str(job_id)) \
+            .limit(1) \
+            .execute()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch recalculation job: {str(e)}"
+        )
+
+    job = result.data[0] if result.data else None
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recalculation job not found"
+        )
+    return _recalc_job_response(job)
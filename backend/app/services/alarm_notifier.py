@@ -1,165 +1,374 @@
 """
 Alarm Email Notifier — Background Task
 
-Polls the alarms table every 30 seconds for:
+Wakes on Supabase Realtime changes to the alarms table (falling back to
+polling) and processes:
 1. New alarms that haven't had activation emails sent (email_notification_sent = false)
 2. Resolved alarms that haven't had resolution emails sent (email_resolution_sent = false)
 
-For each, sends an email via Resend and logs to notification_log.
+For each, sends an email via Resend and logs to notification_log (one
+multi-row insert per poll cycle).
 
 Architecture:
 - Runs as an asyncio background task started in FastAPI lifespan
 - Uses the same Supabase service_role client as the rest of the backend
 - Routes to eligible users via user_project_notifications preferences
 - Claim-before-send pattern prevents duplicates across multiple workers
+- A Realtime subscription on alarms INSERT/UPDATE sets a wake-up event, so
+  emails go out within a second; the loop still polls every 5 minutes
+  (every 30s while the subscription is down) as a safety net
+- With several replicas, only the holder of the notifier lease (renewed
+  each cycle via try_acquire_notifier_lock) runs the claim/send cycle
 """
 
 import asyncio
-from datetime import datetime, timezone
+import json
 from uuid import uuid4
 
-from ..services.supabase import get_supabase
-from ..services.email_service import send_email
+import websockets
+from cachetools import TTLCache
+from postgrest.types import ReturnMethod
+
+from ..services.supabase import get_supabase, get_settings
+from ..services.email_service import EMAIL_ENABLED, send_email_batch
 from ..services.email_templates import format_alarm_email
 from ..services.notifications import get_eligible_email_recipients
+from ..services.queue_logging import get_queue_logger
+
+logger = get_queue_logger("alarm_notifier")
 
-# How often to poll for unsent notifications (seconds)
+# How often to poll for unsent notifications while Realtime is down (seconds)
 POLL_INTERVAL = 30
 
+# Safety-net poll interval while the Realtime subscription is healthy (seconds)
+REALTIME_FALLBACK_INTERVAL = 300
+
+# Phoenix heartbeat interval for the Realtime websocket (server drops at ~60s)
+REALTIME_HEARTBEAT_INTERVAL = 25
+
+# Delay before reconnecting a dropped Realtime subscription (seconds)
+REALTIME_RECONNECT_DELAY = 10
+
 # Max alarms to process per poll cycle (prevent runaway)
 BATCH_SIZE = 20
 
-# Track the background task so we can cancel on shutdown
+# A full batch means more are pending: re-poll at once, up to this many
+# cycles in a row before falling back to the normal wait
+MAX_DRAIN_CYCLES = 50
+
+# Max alarms being sent at once (email_service paces the actual Resend calls)
+SEND_CONCURRENCY = 5
+_send_semaphore = asyncio.Semaphore(SEND_CONCURRENCY)
+
+# Notifier lease: renewed every cycle, so it must outlive the longest wait
+NOTIFIER_LOCK_TTL = REALTIME_FALLBACK_INTERVAL + 60
+
+# Identifies this process as the lease holder
+_notifier_id = str(uuid4())
+_holds_notifier_lock = False
+
+# site_id -> (project_name, site_name, timezone, project_id); site/project
+# names rarely change, and an alarm storm usually comes from one site.
+# Entries are dropped on Realtime sites/projects updates (and the whole
+# cache on every resubscribe), so the TTL only bounds missed updates.
+_alarm_context_cache: TTLCache = TTLCache(maxsize=10_000, ttl=3600)
+
+# Track the background tasks so we can cancel on shutdown
 _notifier_task: asyncio.Task | None = None
+_realtime_task: asyncio.Task | None = None
+
+# Set by the Realtime listener when an alarm needs an email
+_wake_event = asyncio.Event()
+_realtime_connected = False
 
 
 async def start_notifier():
-    """Start the alarm notification background loop."""
-    global _notifier_task
+    """Start the alarm notification background loop and Realtime listener."""
+    global _notifier_task, _realtime_task
+    if not EMAIL_ENABLED:
+        # Don't claim alarms (marking them sent) or log failures for emails
+        # that would all be skipped; pending alarms wait until a key is set
+        logger.warning("[Alarm Notifier] RESEND_API_KEY not set — notifier disabled")
+        return
+
     _notifier_task = asyncio.create_task(_notification_loop())
-    print("[Alarm Notifier] Started — polling every 30s")
+    _realtime_task = asyncio.create_task(_realtime_listener())
+    logger.info("[Alarm Notifier] Started — Realtime wake-ups, polling fallback")
 
 
 async def stop_notifier():
-    """Stop the alarm notification background loop."""
-    global _notifier_task
+    """Stop the alarm notification background loop and Realtime listener."""
+    global _notifier_task, _realtime_task
+    for task in (_realtime_task, _notifier_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    if _holds_notifier_lock:
+        _release_notifier_lock()
     if _notifier_task:
-        _notifier_task.cancel()
-        try:
-            await _notifier_task
-        except asyncio.CancelledError:
-            pass
-        print("[Alarm Notifier] Stopped")
+        logger.info("[Alarm Notifier] Stopped")
 
 
 async def _notification_loop():
-    """Main polling loop — runs forever until cancelled."""
+    """Main loop — waits for a Realtime wake-up or the fallback interval."""
     # Wait a bit on startup to let services initialize
     await asyncio.sleep(5)
 
+    # One shared client for the loop's lifetime (keeps its HTTP pool warm)
+    try:
+        supabase = get_supabase()
+    except ValueError as e:
+        logger.error(f"[Alarm Notifier] Not started: {e}")
+        return
+
+    drain_cycles = 0
     while True:
+        # Clear before processing so changes that land mid-cycle wake us again
+        _wake_event.clear()
+        processed = 0
         try:
-            await _process_pending_notifications()
+            if _acquire_notifier_lock(supabase):
+                processed = await _process_pending_notifications(supabase)
         except asyncio.CancelledError:
             raise
         except Exception as e:
-            print(f"[Alarm Notifier] Error in poll cycle: {e}")
+            logger.error(f"[Alarm Notifier] Error in poll cycle: {e}")
 
-        await asyncio.sleep(POLL_INTERVAL)
+        # Backlog (e.g. alarm storm): keep draining without waiting
+        if processed >= BATCH_SIZE and drain_cycles < MAX_DRAIN_CYCLES:
+            drain_cycles += 1
+            continue
+        drain_cycles = 0
 
+        interval = REALTIME_FALLBACK_INTERVAL if _realtime_connected else POLL_INTERVAL
+        try:
+            await asyncio.wait_for(_wake_event.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
 
-async def _process_pending_notifications():
-    """Single poll cycle: find and send pending alarm emails."""
-    supabase = get_supabase()
 
-    # 1. Find new alarms needing activation email
-    await _send_activation_emails(supabase)
+def _acquire_notifier_lock(supabase) -> bool:
+    """Take or renew the notifier lease; False if another replica holds it."""
+    global _holds_notifier_lock
+    try:
+        result = supabase.rpc("try_acquire_notifier_lock", {
+            "p_holder": _notifier_id,
+            "p_ttl_seconds": NOTIFIER_LOCK_TTL,
+        }).execute()
+    except Exception as e:
+        # Claims are still atomic, so run the cycle rather than stall emails
+        logger.warning(f"[Alarm Notifier] Lock check failed, running cycle anyway: {e}")
+        return True
 
-    # 2. Find resolved alarms needing resolution email
-    await _send_resolution_emails(supabase)
+    acquired = result.data is True
+    if acquired != _holds_notifier_lock:
+        logger.info(f"[Alarm Notifier] {'Acquired' if acquired else 'Lost'} notifier lock")
+    _holds_notifier_lock = acquired
+    return acquired
 
 
-async def _claim_pending_alarms(supabase, is_resolved: bool) -> list[dict]:
-    """Atomically claim alarms for email processing.
+def _release_notifier_lock():
+    """Release the notifier lease so another replica can take over at once."""
+    global _holds_notifier_lock
+    try:
+        get_supabase().rpc("release_notifier_lock", {"p_holder": _notifier_id}).execute()
+    except Exception as e:
+        logger.error(f"[Alarm Notifier] Failed to release notifier lock: {e}")
+    _holds_notifier_lock = False
 
-    Uses UPDATE-then-SELECT pattern: marks alarms as sent FIRST, then fetches
-    the ones we just claimed. Prevents duplicate emails across multiple workers.
-    """
-    if is_resolved:
-        # Find IDs of alarms needing resolution email
-        id_result = supabase.table("alarms").select("id").eq(
-            "email_resolution_sent", False
-        ).eq(
-            "resolved", True
-        ).order("resolved_at", desc=False).limit(BATCH_SIZE).execute()
-    else:
-        # Find IDs of alarms needing activation email
-        id_result = supabase.table("alarms").select("id").eq(
-            "email_notification_sent", False
-        ).eq(
-            "resolved", False
-        ).order("created_at", desc=False).limit(BATCH_SIZE).execute()
-
-    if not id_result.data:
-        return []
-
-    alarm_ids = [a["id"] for a in id_result.data]
-    claimed = []
-
-    for alarm_id in alarm_ids:
-        try:
-            # Claim by marking as sent — use conditional UPDATE so only one
-            # worker succeeds (the flag is already true for the loser).
-            flag = "email_resolution_sent" if is_resolved else "email_notification_sent"
-            claim_result = supabase.table("alarms").update({
-                flag: True
-            }).eq("id", alarm_id).eq(flag, False).execute()
-
-            # Supabase REST returns the updated rows. If empty, another worker
-            # already claimed it (the eq(flag, False) filtered it out).
-            if claim_result.data:
-                claimed.append(alarm_id)
-        except Exception as e:
-            print(f"[Alarm Notifier] Failed to claim alarm {alarm_id}: {e}")
 
-    if not claimed:
-        return []
+# ============================================
+# Realtime wake-ups
+# ============================================
+
+def _needs_email(record: dict) -> bool:
+    """Whether an alarms row still has an activation or resolution email pending."""
+    if record.get("resolved"):
+        return record.get("email_resolution_sent") is False
+    return record.get("email_notification_sent") is False
+
 
-    # Fetch full alarm data for claimed IDs
-    select_fields = "id, site_id, alarm_type, device_name, message, condition, severity, created_at"
-    if is_resolved:
-        select_fields += ", resolved_at"
+async def _realtime_listener():
+    """Keep a Realtime subscription on alarms open, reconnecting on failure."""
+    global _realtime_connected
+    settings = get_settings()
+    if not settings.supabase_url or not settings.supabase_key:
+        return  # no credentials — polling only
 
-    alarms = []
-    for alarm_id in claimed:
+    ws_url = (
+        settings.supabase_url.replace("https://", "wss://").replace("http://", "ws://")
+        + f"/realtime/v1/websocket?apikey={settings.supabase_key}&vsn=1.0.0"
+    )
+
+    while True:
         try:
-            result = supabase.table("alarms").select(select_fields).eq(
-                "id", alarm_id
-            ).execute()
-            if result.data:
-                alarms.append(result.data[0])
+            await _subscribe_alarm_changes(ws_url, settings.supabase_key)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            print(f"[Alarm Notifier] Failed to fetch alarm {alarm_id}: {e}")
+            logger.error(f"[Alarm Notifier] Realtime subscription error: {e}")
+        finally:
+            _realtime_connected = False
+
+        await asyncio.sleep(REALTIME_RECONNECT_DELAY)
+
+
+async def _subscribe_alarm_changes(ws_url: str, access_token: str):
+    """Join the alarms postgres_changes channel and wake the loop on pending emails."""
+    global _realtime_connected
+    topic = "realtime:alarm-notifier"
+
+    async with websockets.connect(ws_url) as ws:
+        await ws.send(json.dumps({
+            "topic": topic,
+            "event": "phx_join",
+            "payload": {
+                "config": {
+                    "postgres_changes": [
+                        {"event": "INSERT", "schema": "public", "table": "alarms"},
+                        {"event": "UPDATE", "schema": "public", "table": "alarms"},
+                        # Renames / timezone changes invalidate cached email context
+                        {"event": "UPDATE", "schema": "public", "table": "sites"},
+                        {"event": "UPDATE", "schema": "public", "table": "projects"},
+                    ],
+                },
+                "access_token": access_token,
+            },
+            "ref": "join",
+        }))
+
+        heartbeat = asyncio.create_task(_realtime_heartbeat(ws))
+        try:
+            async for raw in ws:
+                message = json.loads(raw)
+                event = message.get("event")
+                payload = message.get("payload") or {}
+
+                if event == "phx_reply" and message.get("ref") == "join":
+                    if payload.get("status") != "ok":
+                        raise RuntimeError(f"join rejected: {payload.get('response')}")
+                    _realtime_connected = True
+                    logger.info("[Alarm Notifier] Realtime subscription active")
+                    # Catch anything that changed while we were disconnected
+                    _alarm_context_cache.clear()
+                    _wake_event.set()
+                elif event in ("phx_error", "phx_close"):
+                    raise RuntimeError(f"channel {event}")
+                elif event == "postgres_changes":
+                    data = payload.get("data") or {}
+                    record = data.get("record") or {}
+                    if data.get("table") == "alarms":
+                        if _needs_email(record):
+                            _wake_event.set()
+                    else:
+                        _invalidate_alarm_context(data.get("table"), record.get("id"))
+        finally:
+            heartbeat.cancel()
+
+
+def _invalidate_alarm_context(table: str | None, row_id: str | None):
+    """Drop cached email context for an updated site, or every site of an updated project."""
+    if table == "sites":
+        _alarm_context_cache.pop(row_id, None)
+    elif table == "projects":
+        stale = [
+            site_id for site_id, context in _alarm_context_cache.items()
+            if context[3] == row_id
+        ]
+        for site_id in stale:
+            _alarm_context_cache.pop(site_id, None)
+
+
+async def _realtime_heartbeat(ws):
+    """Send Phoenix heartbeats so the server keeps the socket open."""
+    ref = 0
+    while True:
+        await asyncio.sleep(REALTIME_HEARTBEAT_INTERVAL)
+        ref += 1
+        await ws.send(json.dumps({
+            "topic": "phoenix",
+            "event": "heartbeat",
+            "payload": {},
+            "ref": f"hb-{ref}",
+        }))
 
-    return alarms
 
+# ============================================
+# Poll cycle
+# ============================================
 
-async def _send_activation_emails(supabase):
-    """Claim and send activation emails for new alarms."""
-    alarms = await _claim_pending_alarms(supabase, is_resolved=False)
-    for alarm in alarms:
-        await _send_alarm_email(supabase, alarm, is_resolved=False)
 
+async def _process_pending_notifications(supabase) -> int:
+    """Single poll cycle: find and send pending alarm emails. Returns alarms claimed."""
+    # notification_log rows collected during the cycle, written in one insert
+    log_buffer: list[dict] = []
+
+    try:
+        # New alarms needing activation email and resolved alarms needing
+        # resolution email, claimed together (oldest event first)
+        alarms = await _claim_pending_alarms(supabase)
+        await asyncio.to_thread(_prefetch_alarm_contexts, supabase, alarms)
+        await _send_alarm_emails(supabase, alarms, log_buffer)
+    finally:
+        _flush_notification_log(supabase, log_buffer)
 
-async def _send_resolution_emails(supabase):
-    """Claim and send resolution emails for resolved alarms."""
-    alarms = await _claim_pending_alarms(supabase, is_resolved=True)
-    for alarm in alarms:
-        await _send_alarm_email(supabase, alarm, is_resolved=True)
+    return len(alarms)
 
 
-async def _send_alarm_email(supabase, alarm: dict, is_resolved: bool):
+def _flush_notification_log(supabase, log_buffer: list[dict]):
+    """Write the cycle's notification_log rows with a single multi-row insert."""
+    if not log_buffer:
+        return
+
+    try:
+        supabase.table("notification_log").insert(log_buffer, returning=ReturnMethod.minimal).execute()
+    except Exception as e:
+        logger.error(f"[Alarm Notifier] Failed to log {len(log_buffer)} notifications: {e}")
+
+
+async def _claim_pending_alarms(supabase) -> list[dict]:
+    """Atomically claim alarms for email processing.
+
+    The claim_any_pending_alarms RPC marks up to BATCH_SIZE alarms as sent
+    and returns their email fields in one statement, each tagged with
+    event_type ('activated' or 'resolved'). Rows locked by another worker
+    are skipped, so no alarm is ever claimed twice.
+    """
+    result = supabase.rpc("claim_any_pending_alarms", {
+        "p_limit": BATCH_SIZE,
+    }).execute()
+
+    return result.data or []
+
+
+async def _send_alarm_emails(supabase, alarms: list[dict], log_buffer: list[dict]):
+    """Send emails for claimed alarms concurrently (bounded by SEND_CONCURRENCY)."""
+    results = await asyncio.gather(
+        *[
+            _send_alarm_email(supabase, alarm, alarm.get("event_type") == "resolved", log_buffer)
+            for alarm in alarms
+        ],
+        return_exceptions=True,
+    )
+    for alarm, result in zip(alarms, results):
+        if isinstance(result, Exception):
+            logger.error(f"[Alarm Notifier] Failed to send email for alarm {alarm['id']}: {result}")
+
+
+async def _send_alarm_email(supabase, alarm: dict, is_resolved: bool, log_buffer: list[dict]):
     """Send email for a single alarm to all eligible recipients."""
+    if not EMAIL_ENABLED:
+        return
+
+    async with _send_semaphore:
+        await _deliver_alarm_email(supabase, alarm, is_resolved, log_buffer)
+
+
+async def _deliver_alarm_email(supabase, alarm: dict, is_resolved: bool, log_buffer: list[dict]):
+    """Resolve recipients, render and send one alarm's email, buffering log rows."""
     alarm_id = alarm["id"]
     site_id = alarm.get("site_id")
     alarm_severity = alarm.get("severity", "warning")
@@ -170,9 +379,12 @@ async def _send_alarm_email(supabase, alarm: dict, is_resolved: bool):
     if not project_id:
         return  # orphan alarm — no project to route to
 
-    # Find eligible recipients based on user preferences
-    recipients = get_eligible_email_recipients(
-        supabase, project_id, alarm_severity, is_resolved
+    # Find eligible recipients based on user preferences (sync Supabase
+    # calls run in a worker thread so concurrent alarms overlap and the
+    # event loop stays free for API requests)
+    recipients = await asyncio.to_thread(
+        get_eligible_email_recipients,
+        supabase, project_id, alarm_severity, is_resolved,
     )
 
     if not recipients:
@@ -187,12 +399,15 @@ async def _send_alarm_email(supabase, alarm: dict, is_resolved: bool):
         timezone=timezone_str,
     )
 
-    # Send to each recipient + log individually
+    # One Resend batch call for all recipients; log rows are flushed at the
+    # end of the cycle
     event_type = "resolved" if is_resolved else "activated"
-    for recipient in recipients:
-        email = recipient["email"]
-        result = await send_email(to=email, subject=subject, html=html)
+    emails = [recipient["email"] for recipient in recipients]
+    results = await send_email_batch([
+        {"to": email, "subject": subject, "html": html} for email in emails
+    ])
 
+    for email, result in zip(emails, results):
         if result.get("id"):
             status = "sent"
             error_msg = None
@@ -200,18 +415,45 @@ async def _send_alarm_email(supabase, alarm: dict, is_resolved: bool):
             status = "failed"
             error_msg = result.get("error", "Unknown error")
 
-        try:
-            supabase.table("notification_log").insert({
-                "id": str(uuid4()),
-                "alarm_id": alarm_id,
-                "event_type": event_type,
-                "channel": "email",
-                "recipient": email,
-                "status": status,
-                "error_message": error_msg,
-            }).execute()
-        except Exception as e:
-            print(f"[Alarm Notifier] Failed to log notification for {email}: {e}")
+        log_buffer.append({
+            "alarm_id": alarm_id,
+            "event_type": event_type,
+            "channel": "email",
+            "recipient": email,
+            "status": status,
+            "error_message": error_msg,
+        })
+
+
+def _context_from_site(site: dict) -> tuple[str, str, str, str | None]:
+    """Build (project_name, site_name, timezone, project_id) from a sites row."""
+    site_name = site.get("name", "Unknown Site")
+    project_id = site.get("project_id")
+    project_data = site.get("projects", {})
+    project_name = project_data.get("name", "Unknown Project") if project_data else "Unknown Project"
+    timezone_str = project_data.get("timezone", "UTC") if project_data else "UTC"
+    return project_name, site_name, timezone_str, project_id
+
+
+def _prefetch_alarm_contexts(supabase, alarms: list[dict]):
+    """Load email context for all uncached sites in a claimed batch with one query."""
+    site_ids = list({
+        alarm["site_id"] for alarm in alarms
+        if alarm.get("site_id") and alarm["site_id"] not in _alarm_context_cache
+    })
+    if not site_ids:
+        return
+
+    try:
+        sites_result = supabase.table("sites").select(
+            "id, name, project_id, projects(name, timezone)"
+        ).in_("id", site_ids).execute()
+
+        for site in sites_result.data or []:
+            _alarm_context_cache[site["id"]] = _context_from_site(site)
+    except Exception as e:
+        # _get_alarm_context falls back to per-site lookups
+        logger.error(f"[Alarm Notifier] Error prefetching alarm context for {len(site_ids)} sites: {e}")
 
 
 async def _get_alarm_context(supabase, site_id: str | None) -> tuple[str, str, str, str | None]:
@@ -224,6 +466,22 @@ async def _get_alarm_context(supabase, site_id: str | None) -> tuple[str, str, s
     if not site_id:
         return "Unknown Project", "Unknown Site", "UTC", None
 
+    cached = _alarm_context_cache.get(site_id)
+    if cached is not None:
+        return cached
+
+    # The lookup runs in a worker thread; the (non thread-safe) cache is
+    # only written here on the event loop
+    context = await asyncio.to_thread(_fetch_alarm_context, supabase, site_id)
+    if context is None:
+        return "Unknown Project", "Unknown Site", "UTC", None
+
+    _alarm_context_cache[site_id] = context
+    return context
+
+
+def _fetch_alarm_context(supabase, site_id: str) -> tuple[str, str, str, str | None] | None:
+    """Per-site fallback lookup for _get_alarm_context (blocking; run in a thread)."""
     try:
         # Get site with project info
         site_result = supabase.table("sites").select(
@@ -231,14 +489,8 @@ async def _get_alarm_context(supabase, site_id: str | None) -> tuple[str, str, s
         ).eq("id", site_id).limit(1).execute()
 
         if site_result.data:
-            site = site_result.data[0]
-            site_name = site.get("name", "Unknown Site")
-            project_id = site.get("project_id")
-            project_data = site.get("projects", {})
-            project_name = project_data.get("name", "Unknown Project") if project_data else "Unknown Project"
-            timezone_str = project_data.get("timezone", "UTC") if project_data else "UTC"
-            return project_name, site_name, timezone_str, project_id
+            return _context_from_site(site_result.data[0])
     except Exception as e:
-        print(f"[Alarm Notifier] Error fetching alarm context for site {site_id}: {e}")
+        logger.error(f"[Alarm Notifier] Error fetching alarm context for site {site_id}: {e}")
 
-    return "Unknown Project", "Unknown Site", "UTC", None
+    return None
@@ -2,20 +2,135 @@
 Email Service — Resend API Integration
 
 Sends transactional emails via Resend REST API.
-Uses httpx (already in requirements) — no new dependencies.
+Uses httpx (already in requirements, with the http2 extra).
 
 Free tier: 3,000 emails/month, 100/day.
 Upgrade to Pro ($20/mo) for 50,000/month with no daily cap.
+API rate limit: 2 requests/second (all plans) — sends are throttled to match.
 """
 
+import asyncio
 import os
+import time
+from uuid import uuid4
+
 import httpx
+import orjson
+
+from .queue_logging import get_queue_logger
+
+logger = get_queue_logger("email_service")
 
 RESEND_API_KEY = os.getenv("RESEND_API_KEY", "")
 
+# Without a key every send is skipped, so callers can skip their own work too
+EMAIL_ENABLED = bool(RESEND_API_KEY)
+
 # Custom domain verified on Resend (alerts.volteria.org)
 FROM_EMAIL = os.getenv("RESEND_FROM_EMAIL", "Volteria <no-reply@alerts.volteria.org>")
 
+# Shared client: keeps the TLS connection to api.resend.com alive between
+# sends (HTTP/2, pooled) instead of a fresh handshake per email.
+# Closed from the FastAPI lifespan via close_email_client().
+_client = httpx.AsyncClient(
+    http2=True,
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+    headers={
+        "Authorization": f"Bearer {RESEND_API_KEY}",
+        "Content-Type": "application/json",
+    },
+)
+
+
+# Resend allows 2 requests/second per API key
+RESEND_RATE_PER_SECOND = 2
+
+# Resend's /emails/batch accepts at most this many messages per call
+BATCH_MAX_EMAILS = 100
+
+# Wait before the single retry of a 429 response when Retry-After is missing
+RATE_LIMIT_RETRY_DELAY = 1.0
+
+# Attempts per send for transient failures (5xx, network errors), with
+# RETRY_BASE_DELAY * 2^n seconds between them
+MAX_SEND_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.25
+
+
+class _RateLimiter:
+    """Token bucket: allows `rate` acquisitions per second, bursting up to `rate`."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_limiter = _RateLimiter(RESEND_RATE_PER_SECOND)
+
+
+async def _post_email(payload, url: str = "https://api.resend.com/emails") -> httpx.Response:
+    """
+    POST to Resend within the rate limit.
+
+    Transient failures (5xx, network errors) are retried up to
+    MAX_SEND_ATTEMPTS times with exponential backoff; a 429 is retried once
+    after Retry-After. A final network error is raised to the caller.
+    """
+    # orjson: the body is mostly a multi-KB rendered HTML string
+    body = orjson.dumps(payload)
+    # Same key on every attempt, so a retry after a lost response can't
+    # send the email twice
+    headers = {"Idempotency-Key": str(uuid4())}
+    attempt = 0
+    rate_limit_retried = False
+
+    while True:
+        await _limiter.acquire()
+        try:
+            response = await _client.post(url, content=body, headers=headers)
+        except httpx.TransportError as e:
+            attempt += 1
+            if attempt >= MAX_SEND_ATTEMPTS:
+                raise
+            delay = RETRY_BASE_DELAY * 2 ** (attempt - 1)
+            logger.warning(f"[Email Service] Network error ({e!r}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+            continue
+
+        if response.status_code == 429 and not rate_limit_retried:
+            rate_limit_retried = True
+            try:
+                delay = min(float(response.headers.get("retry-after", RATE_LIMIT_RETRY_DELAY)), 10.0)
+            except ValueError:
+                delay = RATE_LIMIT_RETRY_DELAY
+            logger.warning(f"[Email Service] Rate limited by Resend, retrying in {delay}s")
+            await asyncio.sleep(delay)
+            continue
+
+        if response.status_code >= 500:
+            attempt += 1
+            if attempt < MAX_SEND_ATTEMPTS:
+                delay = RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                logger.warning(f"[Email Service] Resend returned {response.status_code}, retrying in {delay}s")
+                await asyncio.sleep(delay)
+                continue
+
+        return response
+
 
 async def send_email(to: str, subject: str, html: str) -> dict:
     """
@@ -32,34 +147,73 @@ async def send_email(to: str, subject: str, html: str) -> dict:
         Failure: {"error": "422: detailed error message"}
     """
     if not RESEND_API_KEY:
-        print("[Email Service] RESEND_API_KEY not set — skipping email")
+        logger.warning("[Email Service] RESEND_API_KEY not set — skipping email")
         return {"error": "RESEND_API_KEY not configured"}
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://api.resend.com/emails",
-                headers={
-                    "Authorization": f"Bearer {RESEND_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "from": FROM_EMAIL,
-                    "to": [to],
-                    "subject": subject,
-                    "html": html,
-                },
-                timeout=10.0,
-            )
-            response.raise_for_status()
-            result = response.json()
-            print(f"[Email Service] Sent to {to}: {subject} (id: {result.get('id')})")
-            return result
+        response = await _post_email({
+            "from": FROM_EMAIL,
+            "to": [to],
+            "subject": subject,
+            "html": html,
+        })
+        response.raise_for_status()
+        result = response.json()
+        logger.info(f"[Email Service] Sent to {to}: {subject} (id: {result.get('id')})")
+        return result
     except httpx.HTTPStatusError as e:
         error_detail = f"{e.response.status_code}: {e.response.text}"
-        print(f"[Email Service] HTTP error sending to {to}: {error_detail}")
+        logger.error(f"[Email Service] HTTP error sending to {to}: {error_detail}")
         return {"error": error_detail}
     except Exception as e:
         error_detail = f"Connection error: {e}"
-        print(f"[Email Service] Error sending to {to}: {error_detail}")
+        logger.error(f"[Email Service] Error sending to {to}: {error_detail}")
         return {"error": error_detail}
+
+
+async def send_email_batch(messages: list[dict]) -> list[dict]:
+    """
+    Send several emails with one Resend /emails/batch call per 100 messages.
+
+    Args:
+        messages: List of {"to", "subject", "html"} dicts (one recipient each)
+
+    Returns:
+        One dict per message, in order — {"id": ...} on success or
+        {"error": ...} if its batch call failed (a batch fails as a whole)
+    """
+    if not RESEND_API_KEY:
+        logger.warning("[Email Service] RESEND_API_KEY not set — skipping email")
+        return [{"error": "RESEND_API_KEY not configured"} for _ in messages]
+
+    results: list[dict] = []
+    for start in range(0, len(messages), BATCH_MAX_EMAILS):
+        chunk = messages[start:start + BATCH_MAX_EMAILS]
+        payload = [
+            {"from": FROM_EMAIL, "to": [m["to"]], "subject": m["subject"], "html": m["html"]}
+            for m in chunk
+        ]
+        try:
+            response = await _post_email(payload, "https://api.resend.com/emails/batch")
+            response.raise_for_status()
+            sent = response.json().get("data") or []
+            logger.info(f"[Email Service] Sent batch of {len(chunk)}: {chunk[0]['subject']}")
+            results.extend(
+                sent[i] if i < len(sent) else {"error": "Missing id in batch response"}
+                for i in range(len(chunk))
+            )
+        except httpx.HTTPStatusError as e:
+            error_detail = f"{e.response.status_code}: {e.response.text}"
+            logger.error(f"[Email Service] HTTP error sending batch of {len(chunk)}: {error_detail}")
+            results.extend({"error": error_detail} for _ in chunk)
+        except Exception as e:
+            error_detail = f"Connection error: {e}"
+            logger.error(f"[Email Service] Error sending batch of {len(chunk)}: {error_detail}")
+            results.extend({"error": error_detail} for _ in chunk)
+
+    return results
+
+
+async def close_email_client():
+    """Close the shared Resend HTTP client (application shutdown)."""
+    await _client.aclose()
@@ -6,6 +6,9 @@ Includes severity badges, alarm details, timestamps, and links to the alarms pag
 """
 
 from datetime import datetime
+from functools import lru_cache
+from html import escape
+from zoneinfo import ZoneInfo
 
 
 # Severity → color mapping for email badges
@@ -46,24 +49,34 @@ def format_alarm_email(
     created_at = alarm.get("created_at", "")
     resolved_at = alarm.get("resolved_at", "")
 
-    # Format readable alarm type
-    alarm_type_display = alarm_type.replace("_", " ").title()
-
-    # Status — green header for resolved, severity color for activated
+    # Readable alarm type + severity presentation (tiny fixed vocabularies, cached)
+    alarm_type_display, alarm_type_html = _format_alarm_type(alarm_type)
+    header_bg, badge_html, subject_prefix = _severity_presentation(severity, is_resolved)
     status = "RESOLVED" if is_resolved else "ACTIVATED"
-    header_bg = "#16a34a" if is_resolved else SEVERITY_COLORS.get(severity, SEVERITY_COLORS["warning"])["bg"]
-    severity_colors = SEVERITY_COLORS.get(severity, SEVERITY_COLORS["warning"])
 
     # Subject line
-    if is_resolved:
-        subject = f"[Resolved] {alarm_type_display} — {site_name}"
-    else:
-        subject = f"[{severity.upper()}] {alarm_type_display} — {site_name}"
+    subject = f"{subject_prefix} {alarm_type_display} — {site_name}"
 
     # Format timestamps
     created_display = _format_timestamp(created_at, timezone)
     resolved_display = _format_timestamp(resolved_at, timezone) if resolved_at else "—"
 
+    # Alarm text comes from controllers/device configs - escape before it
+    # goes into the HTML (e.g. "Condition: SOC < 20%")
+    message_html = escape(str(message))
+    condition_html = escape(str(condition))
+
+    # Details table rows (label, value, background), joined in one pass
+    detail_rows = [
+        ("Project", project_name, "#f9fafb"),
+        ("Site", site_name, "#ffffff"),
+        ("Device", device_name, "#f9fafb"),
+        ("Triggered", f"{created_display} ({timezone})", "#ffffff"),
+    ]
+    if is_resolved:
+        detail_rows.append(("Resolved", f"{resolved_display} ({timezone})", "#f9fafb"))
+    details_html = "".join([_detail_row(label, value, bg) for label, value, bg in detail_rows])
+
     # Build HTML
     html = f"""<!DOCTYPE html>
 <html>
@@ -85,11 +98,11 @@ def format_alarm_email(
                   <td>
                     <span style="color:#ffffff;font-size:12px;text-transform:uppercase;letter-spacing:1px;opacity:0.9;">Alarm {status}</span>
                     <br>
-                    <span style="color:#ffffff;font-size:22px;font-weight:700;">{alarm_type_display}</span>
+                    <span style="color:#ffffff;font-size:22px;font-weight:700;">{alarm_type_html}</span>
                   </td>
                   <td align="right" valign="top">
                     <span style="display:inline-block;background-color:rgba(255,255,255,0.2);color:#ffffff;padding:4px 12px;border-radius:12px;font-size:12px;font-weight:600;text-transform:uppercase;">
-                      {"resolved" if is_resolved else severity}
+                      {badge_html}
                     </span>
                   </td>
                 </tr>
@@ -101,8 +114,8 @@ def format_alarm_email(
           <tr>
             <td style="padding:20px 24px 12px;">
               {f'<p style="margin:0 0 8px;color:#16a34a;font-size:14px;font-weight:600;">This alarm has been resolved.</p>' if is_resolved else ''}
-              <p style="margin:0;color:#374151;font-size:15px;line-height:1.5;">{message}</p>
-              {f'<p style="margin:8px 0 0;color:#6b7280;font-size:13px;">Condition: {condition}</p>' if condition else ''}
+              <p style="margin:0;color:#374151;font-size:15px;line-height:1.5;">{message_html}</p>
+              {f'<p style="margin:8px 0 0;color:#6b7280;font-size:13px;">Condition: {condition_html}</p>' if condition else ''}
             </td>
           </tr>
 
@@ -110,11 +123,7 @@ def format_alarm_email(
           <tr>
             <td style="padding:8px 24px 20px;">
               <table width="100%" cellpadding="0" cellspacing="0" style="border:1px solid #e5e7eb;border-radius:6px;overflow:hidden;">
-                {_detail_row("Project", project_name, "#f9fafb")}
-                {_detail_row("Site", site_name)}
-                {_detail_row("Device", device_name, "#f9fafb")}
-                {_detail_row("Triggered", f"{created_display} ({timezone})")}
-                {_detail_row("Resolved", f"{resolved_display} ({timezone})", "#f9fafb") if is_resolved else ""}
+                {details_html}
               </table>
             </td>
           </tr>
@@ -149,20 +158,47 @@ def format_alarm_email(
     return subject, html
 
 
+@lru_cache(maxsize=64)
+def _format_alarm_type(alarm_type: str) -> tuple[str, str]:
+    """Readable alarm type (e.g. "low_soc" -> "Low Soc") and its HTML-escaped form."""
+    display = alarm_type.replace("_", " ").title()
+    return display, escape(display)
+
+
+@lru_cache(maxsize=32)
+def _severity_presentation(severity: str, is_resolved: bool) -> tuple[str, str, str]:
+    """
+    Header color, badge HTML and subject prefix for a severity.
+
+    Green header for resolved, severity color for activated.
+    """
+    if is_resolved:
+        return "#16a34a", "resolved", "[Resolved]"
+    header_bg = SEVERITY_COLORS.get(severity, SEVERITY_COLORS["warning"])["bg"]
+    return header_bg, escape(severity), f"[{severity.upper()}]"
+
+
 def _detail_row(label: str, value: str, bg_color: str = "#ffffff") -> str:
-    """Generate a single row for the details table."""
+    """Generate a single row for the details table (value is HTML-escaped)."""
+    value = escape(str(value))
     return f"""<tr>
     <td style="padding:10px 14px;background-color:{bg_color};border-bottom:1px solid #e5e7eb;color:#6b7280;font-size:13px;width:100px;">{label}</td>
     <td style="padding:10px 14px;background-color:{bg_color};border-bottom:1px solid #e5e7eb;color:#111827;font-size:13px;font-weight:500;">{value}</td>
 </tr>"""
 
 
+@lru_cache(maxsize=64)
+def _zone(name: str) -> ZoneInfo:
+    """ZoneInfo for an IANA name, cached (raises ZoneInfoNotFoundError, a KeyError)."""
+    return ZoneInfo(name)
+
+
 def _format_timestamp(ts: str, timezone: str = "UTC") -> str:
     """
     Format an ISO timestamp string for display.
 
-    Attempts timezone conversion if pytz/zoneinfo available,
-    falls back to UTC display otherwise.
+    Converts to the given IANA timezone, falling back to UTC display if
+    the zone is unknown.
     """
     if not ts:
         return "—"
@@ -178,13 +214,9 @@ def _format_timestamp(ts: str, timezone: str = "UTC") -> str:
 
         # Try timezone conversion
         try:
-            from zoneinfo import ZoneInfo
-            if timezone and timezone != "UTC":
-                dt = dt.astimezone(ZoneInfo(timezone))
-            else:
-                dt = dt.astimezone(ZoneInfo("UTC"))
-        except (ImportError, KeyError):
-            pass  # Fall back to UTC
+            dt = dt.astimezone(_zone(timezone or "UTC"))
+        except KeyError:
+            pass  # Unknown zone - fall back to UTC
 
         return dt.strftime("%b %d, %Y at %I:%M %p")
     except Exception:
@@ -5,9 +5,16 @@ Auto-creates in-app notifications when alarms are raised or resolved.
 Supports per-project notification settings with severity thresholds.
 """
 
-from uuid import uuid4
+from datetime import datetime, timedelta, timezone
+
+from cachetools import TTLCache
+from postgrest.types import ReturnMethod
 from supabase import Client
 
+from .queue_logging import get_queue_logger
+
+logger = get_queue_logger("notifications")
+
 
 # Map alarm severity to notification type
 SEVERITY_TO_TYPE = {
@@ -48,6 +55,36 @@ def should_notify_for_severity(alarm_severity: str, min_severity: str) -> bool:
     return alarm_level >= min_level
 
 
+def _or_filter(query, filters: str):
+    """
+    Add a PostgREST or=(...) filter to a query builder.
+
+    postgrest-py 0.13 (pinned via supabase 2.0) has no .or_() method; this
+    adds the same query parameter later releases do.
+    """
+    query.params = query.params.add("or", f"({filters})")
+    return query
+
+
+# Max notification rows per insert request (keeps PostgREST payloads bounded
+# when a project or enterprise has hundreds of recipients)
+NOTIFICATION_INSERT_BATCH_SIZE = 100
+
+
+def _insert_notifications(supabase: Client, notifications: list[dict]):
+    """
+    Bulk insert notification rows in NOTIFICATION_INSERT_BATCH_SIZE chunks.
+
+    Uses Prefer: return=minimal - nothing reads the inserted rows back, so
+    PostgREST skips serializing them into the response.
+    """
+    for start in range(0, len(notifications), NOTIFICATION_INSERT_BATCH_SIZE):
+        supabase.table("notifications").insert(
+            notifications[start:start + NOTIFICATION_INSERT_BATCH_SIZE],
+            returning=ReturnMethod.minimal,
+        ).execute()
+
+
 # Default email preferences when user has no user_project_notifications row.
 # Must match frontend defaults in project-notification-settings.tsx.
 DEFAULT_EMAIL_PREFS = {
@@ -71,9 +108,9 @@ def get_eligible_email_recipients(
 
     Logic:
     1. Get candidate users (assigned + admins + enterprise admins)
-    2. Batch-fetch user_project_notifications preferences
-    3. Apply defaults for users without explicit settings
-    4. Filter by: email_enabled, severity threshold, event type
+    2-4. Filter user_project_notifications by email_enabled, event type and
+       severity threshold server-side; users without explicit settings
+       get the defaults
     5. Fetch email addresses for qualifying users
     """
     try:
@@ -93,32 +130,34 @@ def get_eligible_email_recipients(
 
         all_user_ids = list(candidate_ids)
 
-        # 3. Batch-fetch per-project notification preferences
-        prefs_result = supabase.table("user_project_notifications").select(
-            "user_id, email_enabled, email_min_severity, email_on_active, email_on_resolved"
-        ).eq("project_id", project_id).in_("user_id", all_user_ids).execute()
-
-        prefs_map = {}
-        for pref in (prefs_result.data or []):
-            prefs_map[pref["user_id"]] = pref
-
-        # 4. Filter by preferences
-        qualifying_ids = []
-        for user_id in all_user_ids:
-            prefs = prefs_map.get(user_id, DEFAULT_EMAIL_PREFS)
-
-            if not prefs.get("email_enabled", True):
-                continue
-            if is_resolved and not prefs.get("email_on_resolved", False):
-                continue
-            if not is_resolved and not prefs.get("email_on_active", True):
-                continue
-            if not should_notify_for_severity(
-                alarm_severity, prefs.get("email_min_severity", "major")
-            ):
-                continue
-
-            qualifying_ids.append(user_id)
+        # 3-4. Filter by preferences in the query. Users without a settings
+        # row use DEFAULT_EMAIL_PREFS, so when the defaults qualify, fetch only
+        # the rows that opt out; otherwise fetch only the rows that opt in.
+        alarm_level = SEVERITY_HIERARCHY.get(alarm_severity, 0)
+        trigger_field = "email_on_resolved" if is_resolved else "email_on_active"
+        defaults_qualify = (
+            DEFAULT_EMAIL_PREFS["email_enabled"]
+            and DEFAULT_EMAIL_PREFS[trigger_field]
+            and should_notify_for_severity(alarm_severity, DEFAULT_EMAIL_PREFS["email_min_severity"])
+        )
+
+        prefs_query = supabase.table("user_project_notifications").select(
+            "user_id"
+        ).eq("project_id", project_id).in_("user_id", all_user_ids)
+
+        if defaults_qualify:
+            opted_out = _or_filter(
+                prefs_query,
+                f"email_enabled.eq.false,{trigger_field}.eq.false,"
+                f"email_min_severity_level.gt.{alarm_level}",
+            ).execute()
+            excluded = {row["user_id"] for row in (opted_out.data or [])}
+            qualifying_ids = [user_id for user_id in all_user_ids if user_id not in excluded]
+        else:
+            opted_in = prefs_query.eq("email_enabled", True).eq(
+                trigger_field, True
+            ).lte("email_min_severity_level", alarm_level).execute()
+            qualifying_ids = [row["user_id"] for row in (opted_in.data or [])]
 
         if not qualifying_ids:
             return []
@@ -135,7 +174,7 @@ def get_eligible_email_recipients(
         ]
 
     except Exception as e:
-        print(f"[Notification Service] Error getting email recipients: {e}")
+        logger.exception(f"[Notification Service] Error getting email recipients: {e}")
         return []
 
 
@@ -150,12 +189,11 @@ def create_alarm_notifications(
 
     This is called as a background task after alarm creation or resolution.
 
-    Steps:
-    1. Get all users with access to this project (from user_projects)
-    2. Get admin users who have access to all projects
-    3. For each user, check per-project notification settings first
-    4. Fall back to global notification_preferences if no per-project settings
-    5. Create notification if user meets criteria
+    Recipients come from the get_alarm_recipients RPC (migration 124), which
+    applies in SQL:
+    1. Users assigned to this project (from user_projects)
+    2. Per-project notification settings first (enabled, trigger, severity)
+    3. Global notification_preferences fallback (active alarms only)
 
     Args:
         supabase: Supabase client instance
@@ -167,130 +205,45 @@ def create_alarm_notifications(
         alarm_severity = alarm_data.get("severity", "warning")
         alarm_id = alarm_data.get("id")
         alarm_message = alarm_data.get("message", "")
-        alarm_type = alarm_data.get("alarm_type", "")
 
-        # Get users explicitly assigned to this project (via Edit User → Project Assignments)
-        user_projects_result = supabase.table("user_projects").select(
-            "user_id"
-        ).eq("project_id", project_id).execute()
+        recipients_result = supabase.rpc("get_alarm_recipients", {
+            "p_project_id": project_id,
+            "p_severity": alarm_severity,
+            "p_is_resolved": is_resolved,
+        }).execute()
 
-        all_user_ids = list(set(
-            row["user_id"] for row in (user_projects_result.data or [])
-        ))
+        recipient_ids = [row["user_id"] for row in (recipients_result.data or [])]
 
-        if not all_user_ids:
+        if not recipient_ids:
             # No users to notify
             return
 
-        # Step 3: Get per-project notification settings for these users
-        project_prefs_result = supabase.table("user_project_notifications").select(
-            "user_id, email_enabled, email_min_severity, email_on_active, email_on_resolved, "
-            "sms_enabled, sms_min_severity, sms_on_active, sms_on_resolved"
-        ).eq("project_id", project_id).in_("user_id", all_user_ids).execute()
-
-        # Build map of user_id -> per-project preferences
-        project_prefs_map = {}
-        for pref in (project_prefs_result.data or []):
-            project_prefs_map[pref["user_id"]] = pref
-
-        # Step 4: Get global notification preferences as fallback
-        global_prefs_result = supabase.table("notification_preferences").select(
-            "user_id, in_app_enabled, in_app_critical, in_app_warning, in_app_info, email_enabled, email_critical, email_warning, email_info"
-        ).in_("user_id", all_user_ids).execute()
-
-        # Build map of user_id -> global preferences
-        global_prefs_map = {}
-        for pref in (global_prefs_result.data or []):
-            global_prefs_map[pref["user_id"]] = pref
-
-        # Step 5: Create notifications for users who want them
-        notifications_to_create = []
+        # One notification per recipient - only user_id differs (id defaults in the DB)
         notification_title = f"{'Resolved' if is_resolved else 'New'} {alarm_severity.capitalize()} Alarm"
+        notification_type = SEVERITY_TO_TYPE.get(alarm_severity, "info")
+        action_url = f"/projects/{project_id}"
 
-        for user_id in all_user_ids:
-            # Check per-project settings first
-            project_prefs = project_prefs_map.get(user_id)
-
-            if project_prefs:
-                # Use per-project settings
-                # Check trigger condition (active or resolved)
-                if is_resolved:
-                    # For email - check email_on_resolved
-                    should_email = (
-                        project_prefs.get("email_enabled", True) and
-                        project_prefs.get("email_on_resolved", False) and
-                        should_notify_for_severity(alarm_severity, project_prefs.get("email_min_severity", "major"))
-                    )
-                else:
-                    # For email - check email_on_active
-                    should_email = (
-                        project_prefs.get("email_enabled", True) and
-                        project_prefs.get("email_on_active", True) and
-                        should_notify_for_severity(alarm_severity, project_prefs.get("email_min_severity", "major"))
-                    )
-
-                # For now, in-app notifications follow email settings (could separate later)
-                should_notify_in_app = should_email
-
-            else:
-                # Fall back to global settings
-                global_prefs = global_prefs_map.get(user_id, {})
-
-                # Check if in-app notifications are enabled (default: true)
-                in_app_enabled = global_prefs.get("in_app_enabled", True)
-                if not in_app_enabled:
-                    continue
-
-                # Check if this severity is enabled for in-app (defaults: all true except info)
-                # Map to global settings fields
-                severity_field_map = {
-                    "critical": "in_app_critical",
-                    "major": "in_app_warning",  # Major falls back to warning setting
-                    "warning": "in_app_warning",
-                    "info": "in_app_info"
-                }
-                severity_field = severity_field_map.get(alarm_severity, "in_app_info")
-
-                # Default values: critical=True, warning=False, info=False
-                default_values = {
-                    "in_app_critical": True,
-                    "in_app_warning": False,
-                    "in_app_info": False
-                }
-                severity_enabled = global_prefs.get(severity_field, default_values.get(severity_field, False))
-
-                # Only notify on active alarms when using global settings
-                # (global settings don't have resolved trigger option)
-                if is_resolved:
-                    continue
-
-                should_notify_in_app = severity_enabled
-
-            if not should_notify_in_app:
-                continue
-
-            # User wants this notification - create it
-            notification = {
-                "id": str(uuid4()),
+        notifications_to_create = [
+            {
                 "user_id": user_id,
                 "title": notification_title,
                 "message": alarm_message,
-                "type": SEVERITY_TO_TYPE.get(alarm_severity, "info"),
+                "type": notification_type,
                 "resource_type": "alarm",
                 "resource_id": alarm_id,
-                "action_url": f"/projects/{project_id}",
+                "action_url": action_url,
                 "read": False
             }
-            notifications_to_create.append(notification)
+            for user_id in recipient_ids
+        ]
 
-        # Step 6: Bulk insert all notifications
-        if notifications_to_create:
-            supabase.table("notifications").insert(notifications_to_create).execute()
+        # Bulk insert all notifications
+        _insert_notifications(supabase, notifications_to_create)
 
     except Exception as e:
         # Log error but don't raise - this is a background task
         # We don't want notification failure to affect alarm creation
-        print(f"[Notification Service] Error creating notifications: {e}")
+        logger.exception(f"[Notification Service] Error creating notifications: {e}")
 
 
 def create_resolved_alarm_notifications(
@@ -341,6 +294,25 @@ USAGE_WARNING_MESSAGES = {
 }
 
 
+# Enterprise names cannot be changed after creation (see PATCH
+# /api/enterprises), so names are cached for an hour; the TTL only matters
+# for edits made directly in the database.
+_enterprise_name_cache: TTLCache = TTLCache(maxsize=1000, ttl=3600)
+
+
+def _get_enterprise_name(supabase: Client, enterprise_id: str) -> str:
+    """Enterprise name for notification titles, cached per enterprise."""
+    name = _enterprise_name_cache.get(enterprise_id)
+    if name is None:
+        enterprise_result = supabase.table("enterprises").select(
+            "name"
+        ).eq("id", enterprise_id).single().execute()
+
+        name = enterprise_result.data.get("name", "Unknown") if enterprise_result.data else "Unknown"
+        _enterprise_name_cache[enterprise_id] = name
+    return name
+
+
 def create_usage_warning_notification(
     supabase: Client,
     enterprise_id: str,
@@ -365,36 +337,21 @@ def create_usage_warning_notification(
         # Get warning message template
         warning_config = USAGE_WARNING_MESSAGES.get(warning_type)
         if not warning_config:
-            print(f"[Notification Service] Unknown usage warning type: {warning_type}")
+            logger.warning(f"[Notification Service] Unknown usage warning type: {warning_type}")
             return
 
         # Get enterprise name for context
-        enterprise_result = supabase.table("enterprises").select(
-            "name"
-        ).eq("id", enterprise_id).single().execute()
-
-        enterprise_name = enterprise_result.data.get("name", "Unknown") if enterprise_result.data else "Unknown"
-
-        # Get all enterprise admins for this enterprise
-        enterprise_admins_result = supabase.table("users").select(
-            "id"
-        ).eq("enterprise_id", enterprise_id).eq("role", "enterprise_admin").execute()
+        enterprise_name = _get_enterprise_name(supabase, enterprise_id)
 
-        enterprise_admin_ids = [
-            row["id"] for row in (enterprise_admins_result.data or [])
-        ]
-
-        # Get global admins (super_admin, backend_admin)
-        global_admin_result = supabase.table("users").select(
-            "id"
-        ).in_("role", ["super_admin", "backend_admin"]).execute()
+        # Enterprise admins for this enterprise + global admins
+        # (super_admin, backend_admin) in one query - rows are already unique
+        admins_result = _or_filter(
+            supabase.table("users").select("id"),
+            f"and(role.eq.enterprise_admin,enterprise_id.eq.{enterprise_id}),"
+            "role.in.(super_admin,backend_admin)",
+        ).execute()
 
-        global_admin_ids = [
-            row["id"] for row in (global_admin_result.data or [])
-        ]
-
-        # Combine and deduplicate
-        all_admin_ids = list(set(enterprise_admin_ids + global_admin_ids))
+        all_admin_ids = [row["id"] for row in (admins_result.data or [])]
 
         if not all_admin_ids:
             return
@@ -407,25 +364,25 @@ def create_usage_warning_notification(
 
         title = f"{warning_config['title']} - {enterprise_name}"
 
-        # Create notifications
-        notifications_to_create = []
-        for user_id in all_admin_ids:
-            notification = {
-                "id": str(uuid4()),
+        # Create notifications - only user_id differs per row
+        notification_type = warning_config["type"]
+        notifications_to_create = [
+            {
                 "user_id": user_id,
                 "title": title,
                 "message": message,
-                "type": warning_config["type"],
+                "type": notification_type,
                 "resource_type": "usage",
                 "resource_id": enterprise_id,
                 "action_url": "/settings",
                 "read": False
             }
-            notifications_to_create.append(notification)
+            for user_id in all_admin_ids
+        ]
 
         # Bulk insert
         if notifications_to_create:
-            supabase.table("notifications").insert(notifications_to_create).execute()
+            _insert_notifications(supabase, notifications_to_create)
 
             # Update enterprise warning level
             supabase.table("enterprises").update({
@@ -433,7 +390,7 @@ def create_usage_warning_notification(
             }).eq("id", enterprise_id).execute()
 
     except Exception as e:
-        print(f"[Notification Service] Error creating usage warning notifications: {e}")
+        logger.exception(f"[Notification Service] Error creating usage warning notifications: {e}")
 
 
 def check_and_send_usage_warnings(
@@ -480,8 +437,8 @@ def check_and_send_usage_warnings(
 
             # Check if grace period is ending
             if grace_period_start:
-                from datetime import datetime, timedelta
-                start_date = datetime.fromisoformat(grace_period_start.replace("Z", "+00:00"))
+                # Python 3.11+ (see Dockerfile) parses the "Z" suffix natively
+                start_date = datetime.fromisoformat(grace_period_start)
                 end_date = start_date + timedelta(days=30)
                 days_left = (end_date - datetime.now(start_date.tzinfo)).days
 
@@ -513,9 +470,8 @@ def check_and_send_usage_warnings(
 
             # Start grace period if exceeded for the first time
             if new_level == "exceeded" and not grace_period_start:
-                from datetime import datetime
                 supabase.table("enterprises").update({
-                    "usage_grace_period_start": datetime.utcnow().isoformat()
+                    "usage_grace_period_start": datetime.now(timezone.utc).isoformat()
                 }).eq("id", enterprise_id).execute()
 
         # Clear warning if back under 80%
@@ -526,4 +482,4 @@ def check_and_send_usage_warnings(
             }).eq("id", enterprise_id).execute()
 
     except Exception as e:
-        print(f"[Notification Service] Error checking usage warnings: {e}")
+        logger.exception(f"[Notification Service] Error checking usage warnings: {e}")
@@ -0,0 +1,39 @@
+"""
+Queue Logging
+
+Loggers for background services whose log calls sit on async hot paths
+(alarm notifier, email sending). Records go onto an in-memory queue and a
+single QueueListener thread writes them to stdout, so a slow or contended
+stdout never blocks the event loop.
+
+Output format matches the existing print() lines: the message only, with
+the "[Service Name]" prefix kept in the message text.
+"""
+
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(logging.Formatter("%(message)s"))
+
+_listener = QueueListener(_log_queue, _stream_handler)
+_listener.start()
+
+# Flush anything still queued when the process exits
+atexit.register(_listener.stop)
+
+
+def get_queue_logger(name: str) -> logging.Logger:
+    """Get an INFO-level logger that emits through the shared queue listener."""
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        logger.addHandler(QueueHandler(_log_queue))
+        logger.setLevel(logging.INFO)
+        # Don't also hand records to uvicorn/root handlers on this thread
+        logger.propagate = False
+    return logger
@@ -0,0 +1,172 @@
+"""
+SSH Connection Pool
+
+Keeps authenticated asyncssh connections open per tunnel port so repeated
+commands against the same controller skip the TCP + key exchange + auth
+handshake. Each command runs as its own channel on a pooled connection.
+
+Architecture:
+- Idle connections wait in a per-port asyncio.Queue
+- At most `max_per_host` connections are checked out per port at a time
+- Connections idle for longer than `idle_timeout` (default 10 min, well
+  above the gap between test runs) are closed by a background sweep that
+  runs every `evict_interval` seconds, so ports that are never used again
+  stop sending keepalives
+- Keepalives (every 20s) keep NAT/tunnel mappings warm between test runs;
+  if `keepalive_count_max` go unanswered asyncssh closes the connection,
+  and closed connections are skipped on acquire so a fresh one is built
+- A connection that raised an SSH/socket error is discarded, never
+  returned to the pool
+- Authenticates with client_keys (public key only) when given, otherwise
+  with the password
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple, cast
+
+import asyncssh
+
+
+class _PooledClient(asyncssh.SSHClient):
+    """Client callbacks that record when the connection goes away."""
+
+    def __init__(self):
+        self.closed = False
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.closed = True
+
+
+class AsyncSSHPool:
+    """Pool of authenticated SSH connections keyed by tunnel port."""
+
+    def __init__(
+        self,
+        host: str,
+        username: str,
+        password: str,
+        client_keys: Optional[List[str]] = None,
+        max_per_host: int = 4,
+        idle_timeout: int = 600,
+        keepalive_interval: int = 20,
+        keepalive_count_max: int = 3,
+        evict_interval: int = 60,
+    ):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.client_keys = client_keys
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_count_max = keepalive_count_max
+        self.evict_interval = evict_interval
+
+        # port -> queue of (connection, client callbacks, last used monotonic time)
+        self._idle: Dict[int, asyncio.Queue[Tuple[asyncssh.SSHClientConnection, _PooledClient, float]]] = {}
+        self._slots: Dict[int, asyncio.Semaphore] = {}
+        # Background sweep closing idle connections, started on first acquire
+        self._evict_task: Optional[asyncio.Task] = None
+
+    def _evict_idle(self) -> None:
+        """Drop pooled connections that were closed or have not been used recently."""
+        now = time.monotonic()
+        for queue in self._idle.values():
+            for _ in range(queue.qsize()):
+                conn, client, last_used = queue.get_nowait()
+                if client.closed or now - last_used > self.idle_timeout:
+                    conn.close()
+                else:
+                    queue.put_nowait((conn, client, last_used))
+
+    async def _evict_loop(self) -> None:
+        """Periodically evict idle connections, including ports never acquired again."""
+        while True:
+            await asyncio.sleep(self.evict_interval)
+            self._evict_idle()
+
+    def _ensure_evict_task(self) -> None:
+        if self._evict_task is None or self._evict_task.done():
+            self._evict_task = asyncio.create_task(self._evict_loop())
+
+    async def _connect(self, port: int, timeout: int) -> Tuple[asyncssh.SSHClientConnection, _PooledClient]:
+        if self.client_keys:
+            # Key auth only - never fall back to the password
+            auth = {"client_keys": self.client_keys, "preferred_auth": "publickey"}
+        else:
+            auth = {"password": self.password, "client_keys": None}
+
+        conn, client = await asyncssh.create_connection(
+            _PooledClient,
+            self.host,
+            port=port,
+            username=self.username,
+            known_hosts=None,
+            **auth,
+            # Outputs are a few short lines - zlib only costs CPU both ends
+            compression_algs=None,
+            connect_timeout=timeout,
+            login_timeout=timeout,
+            keepalive_interval=self.keepalive_interval,
+            keepalive_count_max=self.keepalive_count_max,
+        )
+        # create_connection returns the instance built by the _PooledClient factory
+        return conn, cast(_PooledClient, client)
+
+    @asynccontextmanager
+    async def acquire(self, port: int, timeout: int) -> AsyncIterator[asyncssh.SSHClientConnection]:
+        """
+        Check out a connection for the port, connecting if none is idle.
+
+        The connection goes back to the pool on exit unless an SSH or socket
+        error escaped the block, in which case it is closed.
+        """
+        self._ensure_evict_task()
+        self._evict_idle()
+        queue = self._idle.setdefault(port, asyncio.Queue())
+        slots = self._slots.setdefault(port, asyncio.Semaphore(self.max_per_host))
+
+        async with slots:
+            if queue.empty():
+                conn, client = await self._connect(port, timeout)
+            else:
+                conn, client, _ = queue.get_nowait()
+
+            broken = False
+            try:
+                yield conn
+            except (asyncssh.Error, OSError):
+                broken = True
+                raise
+            finally:
+                if broken:
+                    conn.close()
+                else:
+                    queue.put_nowait((conn, client, time.monotonic()))
+
+    def has_idle(self, port: int) -> bool:
+        """Whether an authenticated connection for the port is waiting in the pool."""
+        self._evict_idle()
+        queue = self._idle.get(port)
+        return queue is not None and not queue.empty()
+
+    def discard_idle(self, port: int) -> None:
+        """Close idle connections for a port after one of them turned out dead."""
+        queue = self._idle.get(port)
+        while queue is not None and not queue.empty():
+            conn, _, _ = queue.get_nowait()
+            conn.close()
+
+    async def close(self) -> None:
+        """Close every idle connection (used on application shutdown)."""
+        if self._evict_task is not None:
+            self._evict_task.cancel()
+            self._evict_task = None
+        for queue in self._idle.values():
+            while not queue.empty():
+                conn, _, _ = queue.get_nowait()
+                conn.close()
+                await conn.wait_closed()
+        self._idle.clear()
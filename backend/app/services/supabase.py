@@ -10,9 +10,13 @@ All routers should use this service for database access.
 """
 
 import os
+import threading
+import time
 from functools import lru_cache
 from typing import Optional
 
+import httpx
+from postgrest.utils import SyncClient
 from supabase import create_client, Client
 from pydantic_settings import BaseSettings
 
@@ -45,6 +49,14 @@ def get_settings() -> Settings:
     return Settings()
 
 
+# Connection pool for the shared PostgREST session: bounds in-flight
+# connections across request threads and keeps a few warm for TLS reuse
+POSTGREST_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5)
+
+# Seconds an is_connected() result is reused before probing the database again
+CONNECTION_CHECK_TTL = 10
+
+
 class SupabaseService:
     """
     Supabase client wrapper.
@@ -54,6 +66,12 @@ class SupabaseService:
 
     def __init__(self):
         self._client: Optional[Client] = None
+        # Pooled PostgREST session installed on the client (see client)
+        self._pooled_session: Optional[SyncClient] = None
+        # Serializes installing the pooled session across request threads
+        self._pool_lock = threading.Lock()
+        # (monotonic time, result) of the last is_connected() probe
+        self._last_check: Optional[tuple[float, bool]] = None
 
     @property
     def client(self) -> Client:
@@ -69,16 +87,70 @@ class SupabaseService:
                 settings.supabase_url,
                 settings.supabase_key
             )
+
+        # supabase-py drops its PostgREST client on auth events (sign-in,
+        # token refresh, sign-out) and lazily builds a new one with a default
+        # session - point it back at the pooled session whenever that happened
+        if self._client.postgrest.session is not self._pooled_session:
+            with self._pool_lock:
+                self._pool_postgrest_session(self._client)
         return self._client
 
+    def _pool_postgrest_session(self, client: Client):
+        """
+        Point the PostgREST client at the process-wide pooled session.
+
+        The pooled session is created once and never closed here: request
+        builders bind the session they were created from, so other threads
+        may still be running queries on it. The rebuilt client's default
+        session is left unused rather than closed for the same reason.
+        Must be called with _pool_lock held.
+        """
+        postgrest = client.postgrest
+        default_session = postgrest.session
+        if default_session is self._pooled_session:
+            # Another thread swapped it while we waited for the lock
+            return
+
+        if self._pooled_session is None:
+            self._pooled_session = SyncClient(
+                base_url=default_session.base_url,
+                headers=default_session.headers,
+                timeout=default_session.timeout,
+                limits=POSTGREST_LIMITS,
+            )
+        else:
+            # Carry over the rebuilt client's headers (e.g. a new Authorization)
+            self._pooled_session.headers = default_session.headers
+        postgrest.session = self._pooled_session
+
+    def close(self):
+        """Close the PostgREST connection pool (used on application shutdown)."""
+        with self._pool_lock:
+            if self._pooled_session is not None:
+                self._pooled_session.close()
+                self._pooled_session = None
+
     def is_connected(self) -> bool:
-        """Check if Supabase connection is working."""
+        """
+        Check if Supabase connection is working.
+
+        The probe result is reused for CONNECTION_CHECK_TTL seconds so
+        frequent health checks don't each cost a database round trip.
+        """
+        now = time.monotonic()
+        if self._last_check is not None and now - self._last_check[0] < CONNECTION_CHECK_TTL:
+            return self._last_check[1]
+
         try:
             # Simple query to test connection
             self.client.table("projects").select("id").limit(1).execute()
-            return True
+            connected = True
         except Exception:
-            return False
+            connected = False
+
+        self._last_check = (now, connected)
+        return connected
 
 
 # Singleton instance
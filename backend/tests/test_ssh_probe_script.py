@@ -0,0 +1,96 @@
+"""
+Tests for the SSH test probe script builder and output parser.
+
+Run from backend/:
+    python -m pytest tests
+"""
+
+import subprocess
+
+from app.routers.ssh_tests import build_probe_script, parse_probe_output
+
+
+def test_parse_complete_output():
+    stdout = (
+        "tunnel_ok\n"
+        "===T:service_health:1000===\n"
+        "active\nactive\n"
+        "===T:communication:1250===\n"
+        "200\n"
+        "===T:end:1300===\n"
+    )
+
+    sections, pending = parse_probe_output(stdout)
+
+    assert pending is None
+    assert sections["ssh_tunnel"] == ("tunnel_ok", 0)
+    assert sections["service_health"] == ("active\nactive", 250)
+    assert sections["communication"] == ("200", 50)
+
+
+def test_parse_output_without_trailing_newline_before_marker():
+    # curl -w "%{http_code}" prints no newline; the marker's leading
+    # newline keeps it on its own line
+    stdout = "tunnel_ok\n===T:ota_check:10===\nactive\n401\n===T:end:15===\n"
+
+    sections, pending = parse_probe_output(stdout)
+
+    assert pending is None
+    assert sections["ota_check"] == ("active\n401", 5)
+
+
+def test_parse_marker_like_text_is_output():
+    stdout = "tunnel_ok\n===T:config_sync:5===\n===T:bad marker===\n===T:end:9===\n"
+
+    sections, _ = parse_probe_output(stdout)
+
+    assert sections["config_sync"] == ("===T:bad marker===", 4)
+
+
+def test_parse_partial_output_reports_pending_section():
+    stdout = (
+        "tunnel_ok\n"
+        "===T:service_health:1000===\n"
+        "active\n"
+        "===T:serial_ports:1100===\n"
+        "3"
+    )
+
+    sections, pending = parse_probe_output(stdout)
+
+    assert pending == "serial_ports"
+    assert sections["service_health"] == ("active", 100)
+    # Partial output of the unfinished section carries no duration
+    assert sections["serial_ports"] == ("3", 0)
+
+
+def test_parse_output_before_first_marker():
+    sections, pending = parse_probe_output("tunnel_ok")
+
+    assert pending == "ssh_tunnel"
+    assert sections == {"ssh_tunnel": ("tunnel_ok", 0)}
+
+
+def test_parse_empty_output():
+    sections, pending = parse_probe_output("")
+
+    assert pending == "ssh_tunnel"
+    assert sections == {"ssh_tunnel": ("", 0)}
+
+
+def test_probe_script_round_trip():
+    script = build_probe_script([
+        ("first", "echo one; echo two"),
+        ("second", 'printf "%s" 200'),
+    ])
+
+    stdout = subprocess.run(
+        ["sh", "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    sections, pending = parse_probe_output(stdout)
+
+    assert pending is None
+    assert sections["ssh_tunnel"][0] == "tunnel_ok"
+    assert sections["first"][0] == "one\ntwo"
+    assert sections["second"][0] == "200"
+    assert all(duration >= 0 for _, duration in sections.values())
@@ -21,8 +21,9 @@ Example alarm definition:
 """
 
 import logging
-from dataclasses import dataclass
-from datetime import datetime
+import operator
+import time
+from dataclasses import dataclass, field
 from typing import Optional, Callable
 
 logger = logging.getLogger(__name__)
@@ -37,16 +38,48 @@ SEVERITY_ORDER = {
 }
 
 
-@dataclass
+def _float_eq(value: float, threshold: float) -> bool:
+    return abs(value - threshold) < 0.001  # Float comparison
+
+
+def _float_ne(value: float, threshold: float) -> bool:
+    return abs(value - threshold) >= 0.001
+
+
+def _never(value: float, threshold: float) -> bool:
+    return False
+
+
+# Comparison function per condition operator
+CONDITION_OPERATORS: dict[str, Callable[[float, float], bool]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": _float_eq,
+    "!=": _float_ne,
+}
+
+
+@dataclass(frozen=True, slots=True)
 class ThresholdCondition:
-    """A single threshold condition."""
+    """A single threshold condition (immutable, shared between definitions)."""
     operator: str       # ">", ">=", "<", "<=", "==", "!="
     value: float
     severity: str       # "info", "warning", "major", "critical"
     message: str
+    # Comparison for `operator`, resolved once so evaluation is a single call
+    compare: Callable[[float, float], bool] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        compare = CONDITION_OPERATORS.get(self.operator)
+        if compare is None:
+            logger.warning(f"Unknown operator: {self.operator}")
+            compare = _never
+        object.__setattr__(self, "compare", compare)
 
 
-@dataclass
+@dataclass(slots=True)
 class AlarmDefinition:
     """Definition of a threshold-based alarm."""
     id: str
@@ -59,7 +92,7 @@ class AlarmDefinition:
     cooldown_seconds: int
 
 
-@dataclass
+@dataclass(slots=True)
 class SiteOverride:
     """Site-specific override for an alarm."""
     alarm_definition_id: str
@@ -68,7 +101,7 @@ class SiteOverride:
     cooldown_seconds_override: Optional[int]
 
 
-@dataclass
+@dataclass(slots=True)
 class EvaluationResult:
     """Result of evaluating a value against alarm conditions."""
     triggered: bool
@@ -105,17 +138,46 @@ class ThresholdAlarmEvaluator:
         # Store alarm definitions keyed by definition ID
         self._definitions: dict[str, AlarmDefinition] = {}
 
+        # Definition IDs keyed by (source_type, source_key) so per-sample
+        # lookups don't scan every definition
+        self._by_source: dict[tuple[str, str], list[str]] = {}
+
         # Store site overrides keyed by definition ID
         self._overrides: dict[str, SiteOverride] = {}
 
-        # Track last alarm time per definition ID for cooldown
-        self._last_alarm: dict[str, datetime] = {}
+        # (enabled, conditions, cooldown_seconds) per definition ID with
+        # overrides applied, rebuilt whenever definitions or overrides load
+        self._effective: dict[str, tuple[bool, list[ThresholdCondition], int]] = {}
+
+        # Track last alarm time (time.monotonic()) per definition ID for cooldown
+        self._last_alarm: dict[str, float] = {}
+
+        # One shared ThresholdCondition per (operator, value, severity, message)
+        # - the same thresholds repeat across devices and overrides
+        self._condition_intern: dict[tuple[str, float, str, str], ThresholdCondition] = {}
 
         # Optional callback to raise alarms
         self._alarm_callback = alarm_callback
 
         logger.info("Threshold alarm evaluator initialized")
 
+    def _parse_conditions(self, conditions: list[dict]) -> list[ThresholdCondition]:
+        """
+        Build threshold conditions, sorted by severity (highest first).
+
+        evaluate() relies on this order to stop at the worst triggered
+        condition, so every stored condition list must come from here.
+        """
+        parsed = []
+        for c in conditions:
+            key = (c["operator"], float(c["value"]), c["severity"], c.get("message", ""))
+            condition = self._condition_intern.get(key)
+            if condition is None:
+                condition = self._condition_intern[key] = ThresholdCondition(*key)
+            parsed.append(condition)
+        parsed.sort(key=lambda c: SEVERITY_ORDER.get(c.severity, 0), reverse=True)
+        return parsed
+
     def load_alarm_definitions(self, definitions: list[dict]):
         """
         Load alarm definitions from template data.
@@ -125,15 +187,7 @@ class ThresholdAlarmEvaluator:
         """
         for defn in definitions:
             try:
-                conditions = [
-                    ThresholdCondition(
-                        operator=c["operator"],
-                        value=float(c["value"]),
-                        severity=c["severity"],
-                        message=c.get("message", "")
-                    )
-                    for c in defn.get("conditions", [])
-                ]
+                conditions = self._parse_conditions(defn.get("conditions", []))
 
                 alarm_def = AlarmDefinition(
                     id=defn["id"],
@@ -152,8 +206,17 @@ class ThresholdAlarmEvaluator:
             except (KeyError, TypeError) as e:
                 logger.warning(f"Invalid alarm definition: {e}")
 
+        self._rebuild_source_index()
+        self._rebuild_effective_configs()
         logger.info(f"Loaded {len(self._definitions)} alarm definitions")
 
+    def _rebuild_source_index(self):
+        """Rebuild the (source_type, source_key) -> definition IDs index."""
+        by_source: dict[tuple[str, str], list[str]] = {}
+        for alarm_id, defn in self._definitions.items():
+            by_source.setdefault((defn.source_type, defn.source_key), []).append(alarm_id)
+        self._by_source = by_source
+
     def load_site_overrides(self, overrides: list[dict]):
         """
         Load site-specific overrides.
@@ -165,15 +228,7 @@ class ThresholdAlarmEvaluator:
             try:
                 conditions_override = None
                 if ovr.get("conditions_override"):
-                    conditions_override = [
-                        ThresholdCondition(
-                            operator=c["operator"],
-                            value=float(c["value"]),
-                            severity=c["severity"],
-                            message=c.get("message", "")
-                        )
-                        for c in ovr["conditions_override"]
-                    ]
+                    conditions_override = self._parse_conditions(ovr["conditions_override"])
 
                 site_override = SiteOverride(
                     alarm_definition_id=ovr["alarm_definition_id"],
@@ -188,6 +243,7 @@ class ThresholdAlarmEvaluator:
             except (KeyError, TypeError) as e:
                 logger.warning(f"Invalid site override: {e}")
 
+        self._rebuild_effective_configs()
         logger.info(f"Loaded {len(self._overrides)} site overrides")
 
     def _get_effective_config(self, alarm_id: str) -> tuple[bool, list[ThresholdCondition], int]:
@@ -223,14 +279,20 @@ class ThresholdAlarmEvaluator:
 
         return (enabled, conditions, cooldown)
 
+    def _rebuild_effective_configs(self):
+        """Recompute the effective config of every definition."""
+        self._effective = {
+            alarm_id: self._get_effective_config(alarm_id)
+            for alarm_id in self._definitions
+        }
+
     def _is_in_cooldown(self, alarm_id: str, cooldown_seconds: int) -> bool:
         """Check if alarm is in cooldown period."""
         last_time = self._last_alarm.get(alarm_id)
         if last_time is None:
             return False
 
-        elapsed = (datetime.now() - last_time).total_seconds()
-        return elapsed < cooldown_seconds
+        return time.monotonic() - last_time < cooldown_seconds
 
     def _evaluate_condition(self, value: float, condition: ThresholdCondition) -> bool:
         """
@@ -239,24 +301,7 @@ class ThresholdAlarmEvaluator:
         Returns:
             True if condition is triggered
         """
-        op = condition.operator
-        threshold = condition.value
-
-        if op == ">":
-            return value > threshold
-        elif op == ">=":
-            return value >= threshold
-        elif op == "<":
-            return value < threshold
-        elif op == "<=":
-            return value <= threshold
-        elif op == "==":
-            return abs(value - threshold) < 0.001  # Float comparison
-        elif op == "!=":
-            return abs(value - threshold) >= 0.001
-        else:
-            logger.warning(f"Unknown operator: {op}")
-            return False
+        return condition.compare(value, condition.value)
 
     def evaluate(
         self,
@@ -288,7 +333,10 @@ class ThresholdAlarmEvaluator:
                 value=value
             )
 
-        enabled, conditions, cooldown = self._get_effective_config(alarm_id)
+        config = self._effective.get(alarm_id)
+        if config is None:
+            config = self._effective[alarm_id] = self._get_effective_config(alarm_id)
+        enabled, conditions, cooldown = config
 
         # Check if alarm is enabled
         if not enabled:
@@ -312,23 +360,17 @@ class ThresholdAlarmEvaluator:
                 value=value
             )
 
-        # Sort conditions by severity (highest first) to find worst triggered condition
-        sorted_conditions = sorted(
-            conditions,
-            key=lambda c: SEVERITY_ORDER.get(c.severity, 0),
-            reverse=True
-        )
-
         # Find the highest severity condition that triggers
+        # (conditions are sorted highest severity first at load time)
         triggered_condition = None
-        for condition in sorted_conditions:
+        for condition in conditions:
             if self._evaluate_condition(value, condition):
                 triggered_condition = condition
                 break  # Highest severity that matches
 
         if triggered_condition:
             # Record alarm time
-            self._last_alarm[alarm_id] = datetime.now()
+            self._last_alarm[alarm_id] = time.monotonic()
 
             # Format message with value
             message = triggered_condition.message
@@ -382,14 +424,10 @@ class ThresholdAlarmEvaluator:
         Returns:
             List of EvaluationResults for matching alarms
         """
-        results = []
-
-        for alarm_id, defn in self._definitions.items():
-            if defn.source_type == source_type and defn.source_key == source_key:
-                result = self.evaluate(alarm_id, value, device_name)
-                results.append(result)
-
-        return results
+        return [
+            self.evaluate(alarm_id, value, device_name)
+            for alarm_id in self._by_source.get((source_type, source_key), ())
+        ]
 
     def get_alarm_ids_by_source(self, source_type: str, source_key: str) -> list[str]:
         """
@@ -402,11 +440,7 @@ class ThresholdAlarmEvaluator:
         Returns:
             List of matching alarm definition IDs
         """
-        return [
-            alarm_id
-            for alarm_id, defn in self._definitions.items()
-            if defn.source_type == source_type and defn.source_key == source_key
-        ]
+        return list(self._by_source.get((source_type, source_key), ()))
 
     def clear_cooldowns(self, alarm_id: Optional[str] = None):
         """
@@ -15,8 +15,11 @@ Alarm Types:
 """
 
 import logging
+import threading
+import time
+from collections import deque
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 from typing import Optional, Callable
 
@@ -25,6 +28,13 @@ from alarm_evaluator import ThresholdAlarmEvaluator
 
 logger = logging.getLogger(__name__)
 
+# Alarm records are written to the local database by a background thread,
+# in batches, so an alarm storm doesn't serialize SQLite writes on the
+# control loop. A batch is written every ALARM_FLUSH_INTERVAL_S, or as soon
+# as ALARM_FLUSH_BATCH_SIZE records are waiting.
+ALARM_FLUSH_INTERVAL_S = 0.5
+ALARM_FLUSH_BATCH_SIZE = 64
+
 
 class AlarmType(Enum):
     """Types of alarms that can be generated."""
@@ -45,7 +55,7 @@ class Severity(Enum):
     CRITICAL = "critical"
 
 
-@dataclass
+@dataclass(slots=True)
 class Alarm:
     """An alarm instance."""
     alarm_type: AlarmType
@@ -86,8 +96,18 @@ class AlarmManager:
         self.local_db = local_db
         self.cooldown_seconds = cooldown_seconds
 
-        # Track last alarm time per type+device to prevent duplicates
-        self._last_alarm: dict[str, datetime] = {}
+        # Track last alarm time (time.monotonic()) per type+device to prevent
+        # duplicates - immune to wall-clock jumps (e.g. NTP sync after boot)
+        self._last_alarm: dict[str, float] = {}
+
+        # Records waiting for the writer thread (deque append/popleft are thread-safe)
+        self._pending: deque[AlarmRecord] = deque()
+        self._flush_now = threading.Event()
+        self._closed = threading.Event()
+        self._writer = threading.Thread(
+            target=self._drain_loop, name="alarm-writer", daemon=True
+        )
+        self._writer.start()
 
         # Initialize threshold alarm evaluator with callback to raise_alarm
         self._threshold_evaluator = ThresholdAlarmEvaluator(
@@ -139,11 +159,10 @@ class AlarmManager:
         if last_time is None:
             return False
 
-        elapsed = (datetime.now() - last_time).total_seconds()
-        return elapsed < self.cooldown_seconds
+        return time.monotonic() - last_time < self.cooldown_seconds
 
     def _record_alarm(self, alarm: Alarm):
-        """Record alarm in local database."""
+        """Queue alarm for the local database writer and start its cooldown."""
         record = AlarmRecord(
             timestamp=alarm.timestamp,
             alarm_type=alarm.alarm_type.value,
@@ -151,11 +170,38 @@ class AlarmManager:
             message=alarm.message,
             severity=alarm.severity.value
         )
-        self.local_db.insert_alarm(record)
+        self._pending.append(record)
+        if len(self._pending) >= ALARM_FLUSH_BATCH_SIZE:
+            self._flush_now.set()
 
         # Update cooldown tracker
         key = self._get_alarm_key(alarm.alarm_type, alarm.device_name)
-        self._last_alarm[key] = alarm.timestamp
+        self._last_alarm[key] = time.monotonic()
+
+    def _drain_loop(self):
+        """Writer thread: write pending alarms in batches until closed."""
+        while not self._closed.is_set():
+            self._flush_now.wait(ALARM_FLUSH_INTERVAL_S)
+            self._flush_now.clear()
+            self.flush()
+
+    def flush(self):
+        """Write all pending alarm records to the local database."""
+        while self._pending:
+            batch = []
+            while self._pending and len(batch) < ALARM_FLUSH_BATCH_SIZE:
+                batch.append(self._pending.popleft())
+            try:
+                self.local_db.insert_alarms(batch)
+            except Exception as e:
+                logger.error(f"Failed to store {len(batch)} alarm(s): {e}")
+
+    def close(self):
+        """Stop the writer thread and write any pending alarms (used on shutdown)."""
+        self._closed.set()
+        self._flush_now.set()
+        self._writer.join(timeout=5)
+        self.flush()
 
     # ============================================
     # ALARM GENERATION METHODS
@@ -354,11 +400,13 @@ class AlarmManager:
         Note: This returns from local tracking, not full database query.
         For full history, query the database directly.
         """
-        # Return last alarm times for monitoring
+        # Return last alarm times for monitoring (monotonic -> wall clock)
+        now = datetime.now()
+        now_mono = time.monotonic()
         return [
             {
                 "key": key,
-                "last_triggered": ts.isoformat()
+                "last_triggered": (now - timedelta(seconds=now_mono - ts)).isoformat()
             }
             for key, ts in sorted(
                 self._last_alarm.items(),
@@ -396,12 +444,11 @@ class AlarmManager:
         Returns:
             Number of active alarms
         """
-        now = datetime.now()
+        now = time.monotonic()
         active_count = 0
 
         for key, last_time in self._last_alarm.items():
-            elapsed = (now - last_time).total_seconds()
-            if elapsed < self.cooldown_seconds:
+            if now - last_time < self.cooldown_seconds:
                 active_count += 1
 
         return active_count
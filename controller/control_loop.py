@@ -894,6 +894,9 @@ class ControlLoop:
             # Clean up connections
             for conn in self._connections.values():
                 await conn.disconnect()
+
+            # Write any alarms still waiting for the writer thread
+            self.alarm_manager.close()
             logger.info("Control loop stopped")
 
     async def _maybe_send_heartbeat(self):
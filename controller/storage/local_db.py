@@ -354,6 +354,42 @@ class LocalDatabase:
             logger.info(f"Alarm created: [{record.severity}] {record.alarm_type} - {record.message}")
             return cursor.lastrowid
 
+    def insert_alarms(self, records: list[AlarmRecord]) -> int:
+        """
+        Insert multiple alarm records in one transaction.
+
+        Args:
+            records: Alarm data
+
+        Returns:
+            Number of records inserted
+        """
+        if not records:
+            return 0
+
+        with self._get_connection() as conn:
+            data = [
+                (
+                    r.timestamp.isoformat(),
+                    r.alarm_type,
+                    r.device_name,
+                    r.message,
+                    r.severity,
+                    1 if r.synced else 0
+                )
+                for r in records
+            ]
+            conn.executemany("""
+                INSERT INTO alarms (
+                    timestamp, alarm_type, device_name, message, severity, synced
+                ) VALUES (?, ?, ?, ?, ?, ?)
+            """, data)
+            conn.commit()
+
+        for r in records:
+            logger.info(f"Alarm created: [{r.severity}] {r.alarm_type} - {r.message}")
+        return len(records)
+
     def get_unsynced_alarms(self, limit: int = 50) -> list[AlarmRecord]:
         """
         Get alarms that haven't been synced to cloud.
@@ -0,0 +1,40 @@
+-- Migration 112: Site template sync status view
+--
+-- Joins enabled site devices with their template so the backend's
+-- GET /api/sites/{id}/template-sync-status can read everything it needs
+-- in a single PostgREST request instead of two round-trips.
+
+-- ============================================
+-- 1. View: enabled devices + template update timestamps
+-- ============================================
+
+DROP VIEW IF EXISTS public.site_template_sync_status;
+
+CREATE VIEW public.site_template_sync_status WITH (security_invoker = true) AS
+SELECT
+    sd.id,
+    sd.site_id,
+    sd.name,
+    sd.template_id,
+    sd.template_synced_at,
+    dt.updated_at AS template_updated_at,
+    dt.name AS template_name
+FROM public.site_devices sd
+LEFT JOIN public.device_templates dt ON dt.id = sd.template_id
+WHERE sd.enabled = true;
+
+GRANT SELECT ON public.site_template_sync_status TO authenticated;
+
+-- ============================================
+-- 2. Index: enabled devices per site
+-- ============================================
+
+CREATE INDEX IF NOT EXISTS idx_site_devices_site_enabled
+ON public.site_devices (site_id)
+WHERE enabled = true;
+
+-- ============================================
+-- 3. Comments
+-- ============================================
+
+COMMENT ON VIEW public.site_template_sync_status IS 'Enabled site devices joined with their template update timestamp (template sync status)';
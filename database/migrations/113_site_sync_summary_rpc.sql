@@ -0,0 +1,56 @@
+-- Migration 113: Site sync summary RPC
+--
+-- Computes the template sync status aggregates (last config update,
+-- oldest device sync, devices needing sync) in SQL so the backend's
+-- GET /api/sites/{id}/template-sync-status only has to shape the result.
+--
+-- A device needs sync when it has a template whose updated_at is newer
+-- than the device's template_synced_at (or the device was never synced).
+
+CREATE OR REPLACE FUNCTION public.site_sync_summary(p_site_id UUID)
+RETURNS JSON
+LANGUAGE sql
+STABLE
+SET search_path = ''
+AS $$
+    WITH devices AS (
+        SELECT
+            s.id,
+            s.name,
+            s.template_id,
+            s.template_name,
+            s.template_synced_at,
+            s.template_updated_at,
+            (
+                s.template_id IS NOT NULL
+                AND s.template_updated_at IS NOT NULL
+                AND (s.template_synced_at IS NULL OR s.template_synced_at < s.template_updated_at)
+            ) AS needs_sync
+        FROM public.site_template_sync_status s
+        WHERE s.site_id = p_site_id
+    )
+    SELECT json_build_object(
+        'last_config_update', MAX(d.template_updated_at),
+        'last_sync', MIN(d.template_synced_at),
+        'needs_sync', COALESCE(bool_or(d.needs_sync), false),
+        'total_devices', COUNT(*),
+        'devices_needing_sync', COUNT(*) FILTER (WHERE d.needs_sync),
+        'devices', COALESCE(
+            json_agg(json_build_object(
+                'id', d.id,
+                'name', d.name,
+                'template_id', d.template_id,
+                'template_name', d.template_name,
+                'template_synced_at', d.template_synced_at,
+                'template_updated_at', d.template_updated_at,
+                'needs_sync', d.needs_sync
+            )) FILTER (WHERE d.id IS NOT NULL),
+            '[]'::json
+        )
+    )
+    FROM devices d;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.site_sync_summary(UUID) TO authenticated;
+
+COMMENT ON FUNCTION public.site_sync_summary(UUID) IS 'Template sync status for one site: aggregates plus per-device rows (used by template-sync-status endpoint)';
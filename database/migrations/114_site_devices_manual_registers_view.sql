@@ -0,0 +1,25 @@
+-- Migration 114: Manual registers view for template sync
+--
+-- POST /api/sites/{id}/sync-templates only needs the source:"manual"
+-- entries of each device's register arrays (template entries are
+-- replaced). This view extracts them server-side so the backend no
+-- longer downloads every device's full register JSON.
+
+DROP VIEW IF EXISTS public.site_devices_manual_registers;
+
+CREATE VIEW public.site_devices_manual_registers WITH (security_invoker = true) AS
+SELECT
+    sd.id,
+    sd.site_id,
+    sd.enabled,
+    sd.template_id,
+    sd.template_synced_at,
+    jsonb_path_query_array(COALESCE(sd.registers, '[]'::jsonb), '$[*] ? (@.source == "manual")') AS manual_registers,
+    jsonb_path_query_array(COALESCE(sd.visualization_registers, '[]'::jsonb), '$[*] ? (@.source == "manual")') AS manual_visualization_registers,
+    jsonb_path_query_array(COALESCE(sd.alarm_registers, '[]'::jsonb), '$[*] ? (@.source == "manual")') AS manual_alarm_registers,
+    COALESCE(sd.calculated_fields, 'null'::jsonb) NOT IN ('null'::jsonb, '[]'::jsonb, '{}'::jsonb) AS has_calculated_fields
+FROM public.site_devices sd;
+
+GRANT SELECT ON public.site_devices_manual_registers TO authenticated;
+
+COMMENT ON VIEW public.site_devices_manual_registers IS 'Per-device manual (source=manual) registers only, used by template sync to avoid fetching full register arrays';
@@ -0,0 +1,37 @@
+-- Migration 115: Multi-site template sync summary RPC
+--
+-- Backs POST /api/sites/template-sync-status/batch: one call returns the
+-- template sync aggregates for every requested site (grouped by site_id)
+-- instead of one template-sync-status request per site.
+-- Same needs-sync rule as site_sync_summary (migration 113).
+
+CREATE OR REPLACE FUNCTION public.sites_sync_summary(p_site_ids UUID[])
+RETURNS TABLE (
+    site_id UUID,
+    last_config_update TIMESTAMPTZ,
+    last_sync TIMESTAMPTZ,
+    devices_needing_sync INTEGER,
+    total_devices INTEGER
+)
+LANGUAGE sql
+STABLE
+SET search_path = ''
+AS $$
+    SELECT
+        s.site_id,
+        MAX(s.template_updated_at) AS last_config_update,
+        MIN(s.template_synced_at) AS last_sync,
+        (COUNT(*) FILTER (
+            WHERE s.template_id IS NOT NULL
+              AND s.template_updated_at IS NOT NULL
+              AND (s.template_synced_at IS NULL OR s.template_synced_at < s.template_updated_at)
+        ))::INTEGER AS devices_needing_sync,
+        COUNT(*)::INTEGER AS total_devices
+    FROM public.site_template_sync_status s
+    WHERE s.site_id = ANY(p_site_ids)
+    GROUP BY s.site_id;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.sites_sync_summary(UUID[]) TO authenticated;
+
+COMMENT ON FUNCTION public.sites_sync_summary(UUID[]) IS 'Template sync aggregates per site for a list of sites (used by template-sync-status batch endpoint)';
@@ -0,0 +1,20 @@
+-- Migration 116: Indexes for template sync endpoints
+--
+-- GET /api/sites/{id}/template-sync-status and POST /api/sites/{id}/sync-templates
+-- both filter site_devices by site_id + enabled (idx_site_devices_site_enabled,
+-- added in migration 112) and look up by template_id.
+
+-- ============================================
+-- Add indexes
+-- ============================================
+
+-- Index 1: Template-linked devices only
+-- Speeds up: "Devices using template X" (template usage, template sync)
+CREATE INDEX IF NOT EXISTS idx_site_devices_template_linked
+ON site_devices(template_id)
+WHERE template_id IS NOT NULL;
+
+-- Index 2: Template update time
+-- Speeds up: MAX(updated_at) / "templates changed since" lookups
+CREATE INDEX IF NOT EXISTS idx_device_templates_updated_at
+ON device_templates(updated_at);
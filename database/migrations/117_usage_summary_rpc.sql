@@ -0,0 +1,55 @@
+-- Migration 117: System-wide usage summary RPC
+--
+-- Backs GET /api/usage/summary: enterprise counts, storage totals for today
+-- and 30 days ago, and warning-level counts are aggregated in one call
+-- instead of streaming every snapshot row to the backend and summing there.
+-- Warning thresholds match calculate_warning_level() in routers/usage.py
+-- (80% approaching, 100% exceeded, 110% critical).
+
+CREATE OR REPLACE FUNCTION public.get_usage_summary(d_today DATE, d_month_ago DATE)
+RETURNS TABLE (
+    total_enterprises INTEGER,
+    active_enterprises INTEGER,
+    total_storage BIGINT,
+    old_storage BIGINT,
+    normal INTEGER,
+    approaching INTEGER,
+    exceeded INTEGER,
+    critical INTEGER
+)
+LANGUAGE sql
+STABLE
+SET search_path = ''
+AS $$
+    WITH snapshots AS (
+        SELECT
+            COALESCE(SUM(s.total_storage_bytes) FILTER (WHERE s.snapshot_date = d_today), 0)::BIGINT AS total_storage,
+            COALESCE(SUM(s.total_storage_bytes) FILTER (WHERE s.snapshot_date = d_month_ago), 0)::BIGINT AS old_storage,
+            (COUNT(*) FILTER (WHERE s.snapshot_date = d_today AND COALESCE(s.storage_usage_percent, 0) < 80))::INTEGER AS normal,
+            (COUNT(*) FILTER (WHERE s.snapshot_date = d_today AND s.storage_usage_percent >= 80 AND s.storage_usage_percent < 100))::INTEGER AS approaching,
+            (COUNT(*) FILTER (WHERE s.snapshot_date = d_today AND s.storage_usage_percent >= 100 AND s.storage_usage_percent < 110))::INTEGER AS exceeded,
+            (COUNT(*) FILTER (WHERE s.snapshot_date = d_today AND s.storage_usage_percent >= 110))::INTEGER AS critical
+        FROM public.enterprise_usage_snapshots s
+        WHERE s.snapshot_date IN (d_today, d_month_ago)
+    ),
+    enterprises AS (
+        SELECT
+            COUNT(*)::INTEGER AS total_enterprises,
+            (COUNT(*) FILTER (WHERE COALESCE(e.is_active, true)))::INTEGER AS active_enterprises
+        FROM public.enterprises e
+    )
+    SELECT
+        e.total_enterprises,
+        e.active_enterprises,
+        s.total_storage,
+        s.old_storage,
+        s.normal,
+        s.approaching,
+        s.exceeded,
+        s.critical
+    FROM enterprises e, snapshots s;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_usage_summary(DATE, DATE) TO authenticated;
+
+COMMENT ON FUNCTION public.get_usage_summary(DATE, DATE) IS 'System-wide usage totals, growth baseline and warning-level counts (used by usage summary endpoint)';
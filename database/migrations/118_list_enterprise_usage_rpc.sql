@@ -0,0 +1,85 @@
+-- Migration 118: Filtered enterprise usage RPC
+--
+-- Backs GET /api/usage/enterprises?warning_level=...: joins active
+-- enterprises with their package and the snapshot for the given date, and
+-- applies the warning-level filter in Postgres so only matching rows are
+-- returned. Usage percent and thresholds match list_enterprise_usage /
+-- calculate_warning_level() in routers/usage.py (percent of the package
+-- limit; no package or a zero limit counts as 0%).
+
+CREATE OR REPLACE FUNCTION public.list_enterprise_usage(p_warning_level TEXT, p_date DATE)
+RETURNS TABLE (
+    enterprise_id UUID,
+    enterprise_name TEXT,
+    usage_package_id UUID,
+    usage_grace_period_start TIMESTAMPTZ,
+    package_name TEXT,
+    storage_limit_bytes BIGINT,
+    total_storage_bytes BIGINT,
+    control_logs_bytes BIGINT,
+    control_logs_rows BIGINT,
+    alarms_bytes BIGINT,
+    alarms_rows BIGINT,
+    heartbeats_bytes BIGINT,
+    audit_logs_bytes BIGINT,
+    sites_count INTEGER,
+    controllers_count INTEGER,
+    users_count INTEGER,
+    snapshot_date DATE,
+    usage_percent DOUBLE PRECISION,
+    warning_level TEXT
+)
+LANGUAGE sql
+STABLE
+SET search_path = ''
+AS $$
+    WITH usage AS (
+        SELECT
+            e.id AS enterprise_id,
+            e.name::TEXT AS enterprise_name,
+            e.usage_package_id,
+            e.usage_grace_period_start,
+            up.name::TEXT AS package_name,
+            up.storage_limit_bytes,
+            COALESCE(s.total_storage_bytes, 0) AS total_storage_bytes,
+            COALESCE(s.control_logs_bytes, 0) AS control_logs_bytes,
+            COALESCE(s.control_logs_rows, 0) AS control_logs_rows,
+            COALESCE(s.alarms_bytes, 0) AS alarms_bytes,
+            COALESCE(s.alarms_rows, 0) AS alarms_rows,
+            COALESCE(s.heartbeats_bytes, 0) AS heartbeats_bytes,
+            COALESCE(s.audit_logs_bytes, 0) AS audit_logs_bytes,
+            COALESCE(s.sites_count, 0) AS sites_count,
+            COALESCE(s.controllers_count, 0) AS controllers_count,
+            COALESCE(s.users_count, 0) AS users_count,
+            s.snapshot_date,
+            COALESCE(
+                COALESCE(s.total_storage_bytes, 0)::DOUBLE PRECISION
+                    / NULLIF(up.storage_limit_bytes, 0) * 100,
+                0
+            ) AS usage_percent
+        FROM public.enterprises e
+        LEFT JOIN public.usage_packages up ON up.id = e.usage_package_id
+        LEFT JOIN public.enterprise_usage_snapshots s
+            ON s.enterprise_id = e.id AND s.snapshot_date = p_date
+        WHERE e.is_active = true
+    ),
+    leveled AS (
+        SELECT
+            u.*,
+            CASE
+                WHEN u.usage_percent >= 110 THEN 'critical'
+                WHEN u.usage_percent >= 100 THEN 'exceeded'
+                WHEN u.usage_percent >= 80 THEN 'approaching'
+                ELSE 'normal'
+            END AS warning_level
+        FROM usage u
+    )
+    SELECT l.*
+    FROM leveled l
+    WHERE l.warning_level = p_warning_level
+    ORDER BY l.enterprise_name;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.list_enterprise_usage(TEXT, DATE) TO authenticated;
+
+COMMENT ON FUNCTION public.list_enterprise_usage(TEXT, DATE) IS 'Active enterprises at a given warning level with package and snapshot usage (used by usage enterprises endpoint)';
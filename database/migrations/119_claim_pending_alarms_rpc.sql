@@ -0,0 +1,74 @@
+-- Migration 119: Atomic alarm email claim RPC
+--
+-- Backs the alarm email notifier (services/alarm_notifier.py). One call
+-- marks up to p_limit alarms as sent and returns their email fields,
+-- replacing the select-ids / per-id conditional UPDATE / per-id SELECT
+-- round trips. FOR UPDATE SKIP LOCKED lets several backend workers claim
+-- concurrently without ever handing out the same alarm twice.
+--
+-- p_resolved = false: new alarms needing an activation email (oldest first)
+-- p_resolved = true:  resolved alarms needing a resolution email (oldest first)
+
+CREATE OR REPLACE FUNCTION public.claim_pending_alarms(p_resolved BOOLEAN, p_limit INTEGER)
+RETURNS TABLE (
+    id UUID,
+    site_id UUID,
+    alarm_type TEXT,
+    device_name TEXT,
+    message TEXT,
+    condition TEXT,
+    severity TEXT,
+    created_at TIMESTAMPTZ,
+    resolved_at TIMESTAMPTZ
+)
+LANGUAGE plpgsql
+SET search_path = ''
+AS $$
+#variable_conflict use_column
+BEGIN
+    -- Separate branches so each uses its partial index from migration 109
+    IF p_resolved THEN
+        RETURN QUERY
+        WITH pending AS (
+            SELECT a.id
+            FROM public.alarms a
+            WHERE a.email_resolution_sent = false AND a.resolved = true
+            ORDER BY a.resolved_at
+            LIMIT p_limit
+            FOR UPDATE SKIP LOCKED
+        ),
+        claimed AS (
+            UPDATE public.alarms a
+            SET email_resolution_sent = true
+            FROM pending
+            WHERE a.id = pending.id
+            RETURNING a.id, a.site_id, a.alarm_type, a.device_name, a.message,
+                      a.condition, a.severity, a.created_at, a.resolved_at
+        )
+        SELECT c.* FROM claimed c ORDER BY c.resolved_at;
+    ELSE
+        RETURN QUERY
+        WITH pending AS (
+            SELECT a.id
+            FROM public.alarms a
+            WHERE a.email_notification_sent = false AND a.resolved = false
+            ORDER BY a.created_at
+            LIMIT p_limit
+            FOR UPDATE SKIP LOCKED
+        ),
+        claimed AS (
+            UPDATE public.alarms a
+            SET email_notification_sent = true
+            FROM pending
+            WHERE a.id = pending.id
+            RETURNING a.id, a.site_id, a.alarm_type, a.device_name, a.message,
+                      a.condition, a.severity, a.created_at, a.resolved_at
+        )
+        SELECT c.* FROM claimed c ORDER BY c.created_at;
+    END IF;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.claim_pending_alarms(BOOLEAN, INTEGER) TO service_role;
+
+COMMENT ON FUNCTION public.claim_pending_alarms(BOOLEAN, INTEGER) IS 'Atomically claim alarms needing an activation or resolution email (used by backend alarm notifier)';
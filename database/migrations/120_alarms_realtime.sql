@@ -0,0 +1,15 @@
+-- Migration 120: Realtime for alarms
+--
+-- The backend alarm notifier subscribes to postgres_changes on alarms so
+-- activation/resolution emails go out as soon as a row needs one, instead
+-- of waiting for the next 30s poll. Polling remains as a fallback.
+
+-- Note: Use DO block to avoid error if already added
+DO $$
+BEGIN
+  ALTER PUBLICATION supabase_realtime ADD TABLE public.alarms;
+EXCEPTION
+  WHEN duplicate_object THEN
+    -- Table already in publication, ignore
+    NULL;
+END $$;
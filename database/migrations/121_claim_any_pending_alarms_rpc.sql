@@ -0,0 +1,58 @@
+-- Migration 121: Single alarm email claim RPC for both event types
+--
+-- Replaces the two claim_pending_alarms calls per notifier cycle (one for
+-- activation emails, one for resolution emails) with one call that claims
+-- both kinds, oldest event first. Each row carries an event_type
+-- discriminator ('activated' / 'resolved') so the backend knows which
+-- email to send. The OR of the two partial-index predicates from
+-- migration 109 still plans as a BitmapOr over those indexes.
+--
+-- claim_pending_alarms (migration 119) is kept for older backends.
+
+CREATE OR REPLACE FUNCTION public.claim_any_pending_alarms(p_limit INTEGER)
+RETURNS TABLE (
+    id UUID,
+    event_type TEXT,
+    site_id UUID,
+    alarm_type TEXT,
+    device_name TEXT,
+    message TEXT,
+    condition TEXT,
+    severity TEXT,
+    created_at TIMESTAMPTZ,
+    resolved_at TIMESTAMPTZ
+)
+LANGUAGE sql
+SET search_path = ''
+AS $$
+    WITH pending AS (
+        SELECT
+            a.id,
+            CASE WHEN a.resolved THEN 'resolved' ELSE 'activated' END AS event_type,
+            COALESCE(a.resolved_at, a.created_at) AS event_at
+        FROM public.alarms a
+        WHERE (a.email_notification_sent = false AND a.resolved = false)
+           OR (a.email_resolution_sent = false AND a.resolved = true)
+        ORDER BY COALESCE(a.resolved_at, a.created_at)
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    ),
+    claimed AS (
+        UPDATE public.alarms a
+        SET email_notification_sent = a.email_notification_sent OR pending.event_type = 'activated',
+            email_resolution_sent = a.email_resolution_sent OR pending.event_type = 'resolved'
+        FROM pending
+        WHERE a.id = pending.id
+        RETURNING a.id, pending.event_type, a.site_id, a.alarm_type, a.device_name,
+                  a.message, a.condition, a.severity, a.created_at, a.resolved_at,
+                  pending.event_at
+    )
+    SELECT c.id, c.event_type, c.site_id, c.alarm_type, c.device_name, c.message,
+           c.condition, c.severity, c.created_at, c.resolved_at
+    FROM claimed c
+    ORDER BY c.event_at;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.claim_any_pending_alarms(INTEGER) TO service_role;
+
+COMMENT ON FUNCTION public.claim_any_pending_alarms(INTEGER) IS 'Atomically claim alarms needing an activation or resolution email, tagged with event_type (used by backend alarm notifier)';
@@ -0,0 +1,65 @@
+-- Migration 122: Single-replica alarm notifier lock
+--
+-- With more than one backend replica, every alarm notifier loop raced on
+-- claim_any_pending_alarms. SKIP LOCKED kept that correct but each losing
+-- replica still spent a round trip per cycle. Only the lock holder now
+-- runs the claim/send cycle.
+--
+-- pg_try_advisory_lock is session-scoped, and PostgREST runs each RPC on
+-- a pooled connection, so the lock would stick to whichever connection
+-- happened to serve the call. Use a lease row with an expiry instead: the
+-- holder renews it every cycle, and another replica takes over once the
+-- lease lapses (e.g. the holder crashed without releasing).
+
+-- ============================================
+-- 1. Lease table
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.backend_locks (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+ALTER TABLE public.backend_locks ENABLE ROW LEVEL SECURITY;
+
+-- No policies: only service_role (bypasses RLS) touches this table
+
+-- ============================================
+-- 2. Acquire / release RPCs
+-- ============================================
+
+-- Take or renew the notifier lease; true if p_holder now holds it
+CREATE OR REPLACE FUNCTION public.try_acquire_notifier_lock(p_holder TEXT, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN
+LANGUAGE sql
+SET search_path = ''
+AS $$
+    WITH acquired AS (
+        INSERT INTO public.backend_locks AS l (name, holder, expires_at)
+        VALUES ('alarm_notifier', p_holder, NOW() + make_interval(secs => p_ttl_seconds))
+        ON CONFLICT (name) DO UPDATE
+        SET holder = EXCLUDED.holder,
+            expires_at = EXCLUDED.expires_at
+        WHERE l.holder = EXCLUDED.holder OR l.expires_at < NOW()
+        RETURNING 1
+    )
+    SELECT EXISTS (SELECT 1 FROM acquired);
+$$;
+
+-- Give up the lease on shutdown so another replica can take over at once
+CREATE OR REPLACE FUNCTION public.release_notifier_lock(p_holder TEXT)
+RETURNS VOID
+LANGUAGE sql
+SET search_path = ''
+AS $$
+    DELETE FROM public.backend_locks
+    WHERE name = 'alarm_notifier' AND holder = p_holder;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.try_acquire_notifier_lock(TEXT, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.release_notifier_lock(TEXT) TO service_role;
+
+COMMENT ON TABLE public.backend_locks IS 'Expiring leases that keep singleton backend jobs on one replica';
+COMMENT ON FUNCTION public.try_acquire_notifier_lock(TEXT, INTEGER) IS 'Take or renew the alarm notifier lease (used by backend alarm notifier)';
+COMMENT ON FUNCTION public.release_notifier_lock(TEXT) IS 'Release the alarm notifier lease held by p_holder';
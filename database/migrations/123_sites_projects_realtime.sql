@@ -0,0 +1,24 @@
+-- Migration 123: Realtime for sites and projects
+--
+-- The backend alarm notifier caches each site's email context (site name,
+-- project name, timezone) and drops entries when it sees UPDATE events on
+-- sites or projects over its existing Realtime subscription.
+
+-- Note: Use DO blocks to avoid errors if already added
+DO $$
+BEGIN
+  ALTER PUBLICATION supabase_realtime ADD TABLE public.sites;
+EXCEPTION
+  WHEN duplicate_object THEN
+    -- Table already in publication, ignore
+    NULL;
+END $$;
+
+DO $$
+BEGIN
+  ALTER PUBLICATION supabase_realtime ADD TABLE public.projects;
+EXCEPTION
+  WHEN duplicate_object THEN
+    -- Table already in publication, ignore
+    NULL;
+END $$;
@@ -0,0 +1,85 @@
+-- Migration 124: In-app alarm notification recipients RPC
+--
+-- Backs create_alarm_notifications (services/notifications.py). One call
+-- returns the users who should get an in-app notification for an alarm,
+-- replacing the user_projects / user_project_notifications /
+-- notification_preferences reads and the Python preference loop.
+--
+-- Rules (same as the previous Python logic):
+-- 1. Candidates: users assigned to the project (user_projects)
+-- 2. With a user_project_notifications row: email_enabled, the active /
+--    resolved trigger, and severity >= email_min_severity
+--    (info < warning < minor < major < critical)
+-- 3. Otherwise (global notification_preferences, active alarms only):
+--    in_app_enabled (default true) and the per-severity in_app_* toggle
+--    (defaults: critical on, everything else off)
+--
+-- The in_app_critical / in_app_warning / in_app_info toggles are not
+-- created by any migration, so they are read through to_jsonb() to keep
+-- the function valid either way. Where they are missing, the previous
+-- Python select of those columns failed and nobody was notified; the
+-- function keeps that behavior by returning no recipients. A NULL toggle
+-- counts as off, as it did in Python.
+
+CREATE OR REPLACE FUNCTION public.get_alarm_recipients(
+    p_project_id UUID,
+    p_severity TEXT,
+    p_is_resolved BOOLEAN
+)
+RETURNS TABLE (user_id UUID)
+LANGUAGE sql
+STABLE
+SET search_path = ''
+AS $$
+    WITH toggles AS (
+        SELECT count(*) = 3 AS present
+        FROM information_schema.columns
+        WHERE table_schema = 'public'
+          AND table_name = 'notification_preferences'
+          AND column_name IN ('in_app_critical', 'in_app_warning', 'in_app_info')
+    ),
+    candidates AS (
+        SELECT DISTINCT up.user_id
+        FROM public.user_projects up
+        WHERE up.project_id = p_project_id
+    ),
+    severity_rank AS (
+        SELECT CASE p_severity
+            WHEN 'info' THEN 1 WHEN 'warning' THEN 2 WHEN 'minor' THEN 3
+            WHEN 'major' THEN 4 WHEN 'critical' THEN 5 ELSE 0
+        END AS alarm_level
+    )
+    SELECT c.user_id
+    FROM candidates c
+    CROSS JOIN severity_rank s
+    CROSS JOIN toggles t
+    LEFT JOIN public.user_project_notifications upn
+        ON upn.user_id = c.user_id AND upn.project_id = p_project_id
+    LEFT JOIN public.notification_preferences np
+        ON np.user_id = c.user_id
+    WHERE t.present AND CASE
+        -- Per-project settings
+        WHEN upn.id IS NOT NULL THEN
+            upn.email_enabled
+            AND CASE WHEN p_is_resolved THEN upn.email_on_resolved ELSE upn.email_on_active END
+            AND s.alarm_level >= CASE upn.email_min_severity
+                WHEN 'info' THEN 1 WHEN 'warning' THEN 2 WHEN 'minor' THEN 3
+                WHEN 'major' THEN 4 WHEN 'critical' THEN 5 ELSE 0
+            END
+        -- Global settings have no resolved trigger
+        WHEN p_is_resolved THEN false
+        WHEN np.id IS NULL THEN p_severity = 'critical'
+        ELSE
+            np.in_app_enabled
+            AND CASE p_severity
+                WHEN 'critical' THEN COALESCE((to_jsonb(np) ->> 'in_app_critical')::BOOLEAN, false)
+                WHEN 'major' THEN COALESCE((to_jsonb(np) ->> 'in_app_warning')::BOOLEAN, false)
+                WHEN 'warning' THEN COALESCE((to_jsonb(np) ->> 'in_app_warning')::BOOLEAN, false)
+                ELSE COALESCE((to_jsonb(np) ->> 'in_app_info')::BOOLEAN, false)
+            END
+    END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_alarm_recipients(UUID, TEXT, BOOLEAN) TO service_role;
+
+COMMENT ON FUNCTION public.get_alarm_recipients(UUID, TEXT, BOOLEAN) IS 'Users who should receive an in-app notification for an alarm (used by backend create_alarm_notifications)';
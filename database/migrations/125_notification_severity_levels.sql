@@ -0,0 +1,23 @@
+-- Migration 125: Numeric severity threshold on per-project notification settings
+--
+-- Adds email_min_severity_level, a generated numeric rank of
+-- email_min_severity, so the backend can filter per-project email settings
+-- with a plain range comparison in the query (email_min_severity_level <= alarm
+-- level) instead of mapping severity strings to ranks row by row in Python.
+--
+-- Order: info (1) < warning (2) < minor (3) < major (4) < critical (5)
+
+ALTER TABLE public.user_project_notifications
+ADD COLUMN IF NOT EXISTS email_min_severity_level SMALLINT
+GENERATED ALWAYS AS (
+    CASE email_min_severity
+        WHEN 'info' THEN 1
+        WHEN 'warning' THEN 2
+        WHEN 'minor' THEN 3
+        WHEN 'major' THEN 4
+        WHEN 'critical' THEN 5
+        ELSE 0
+    END
+) STORED;
+
+COMMENT ON COLUMN public.user_project_notifications.email_min_severity_level IS 'Numeric rank of email_min_severity (info=1 .. critical=5), generated';
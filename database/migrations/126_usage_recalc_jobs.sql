@@ -0,0 +1,39 @@
+-- Migration 126: Usage recalculation jobs table
+--
+-- POST /api/usage/calculate (all enterprises) queues the recalculation as a
+-- background task and returns a job id to poll via GET /calculate/{job_id}.
+-- The backend runs several uvicorn workers, so job state lives here rather
+-- than in process memory: the poll can land on any worker, and the
+-- "already running" check sees jobs started by every worker.
+
+-- ============================================
+-- 1. Jobs table
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.usage_recalc_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    status TEXT NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'completed', 'failed')),
+    enterprises_updated INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_by UUID REFERENCES public.users(id) ON DELETE SET NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    completed_at TIMESTAMPTZ
+);
+
+ALTER TABLE public.usage_recalc_jobs ENABLE ROW LEVEL SECURITY;
+
+-- No policies: only the backend (service_role, bypasses RLS) touches this table
+
+-- ============================================
+-- 2. At most one active job
+-- ============================================
+
+-- Two workers queueing at the same moment: the second insert fails with a
+-- unique violation and the backend returns the job that won
+CREATE UNIQUE INDEX IF NOT EXISTS idx_usage_recalc_jobs_one_active
+ON public.usage_recalc_jobs ((true))
+WHERE status IN ('queued', 'running');
+
+COMMENT ON TABLE public.usage_recalc_jobs IS 'All-enterprise usage recalculation jobs queued by POST /api/usage/calculate';
@@ -0,0 +1,82 @@
+-- Migration 127: Per-severity in-app toggles on notification_preferences
+--
+-- create_alarm_notifications has always read in_app_critical /
+-- in_app_warning / in_app_info from notification_preferences, but no
+-- migration created them (022 only added in_app_enabled). Where the
+-- columns were missing no in-app alarm notifications were created; see
+-- get_alarm_recipients (migration 124).
+--
+-- BEHAVIOR CHANGE: on databases that lacked the columns, in-app alarm
+-- notifications start being created for assigned users once this runs.
+-- Defaults match the ones the notification service always assumed:
+-- critical on, warning (also used for major) and info off.
+
+-- ============================================
+-- 1. Columns
+-- ============================================
+
+ALTER TABLE public.notification_preferences
+  ADD COLUMN IF NOT EXISTS in_app_critical BOOLEAN NOT NULL DEFAULT true,
+  ADD COLUMN IF NOT EXISTS in_app_warning BOOLEAN NOT NULL DEFAULT false,
+  ADD COLUMN IF NOT EXISTS in_app_info BOOLEAN NOT NULL DEFAULT false;
+
+COMMENT ON COLUMN public.notification_preferences.in_app_critical IS 'In-app notifications for critical alarms (global fallback when no per-project settings)';
+COMMENT ON COLUMN public.notification_preferences.in_app_warning IS 'In-app notifications for warning and major alarms (global fallback)';
+COMMENT ON COLUMN public.notification_preferences.in_app_info IS 'In-app notifications for info and minor alarms (global fallback)';
+
+-- ============================================
+-- 2. Recipients RPC reads the columns directly
+-- ============================================
+
+CREATE OR REPLACE FUNCTION public.get_alarm_recipients(
+    p_project_id UUID,
+    p_severity TEXT,
+    p_is_resolved BOOLEAN
+)
+RETURNS TABLE (user_id UUID)
+LANGUAGE sql
+STABLE
+SET search_path = ''
+AS $$
+    WITH candidates AS (
+        SELECT DISTINCT up.user_id
+        FROM public.user_projects up
+        WHERE up.project_id = p_project_id
+    ),
+    severity_rank AS (
+        SELECT CASE p_severity
+            WHEN 'info' THEN 1 WHEN 'warning' THEN 2 WHEN 'minor' THEN 3
+            WHEN 'major' THEN 4 WHEN 'critical' THEN 5 ELSE 0
+        END AS alarm_level
+    )
+    SELECT c.user_id
+    FROM candidates c
+    CROSS JOIN severity_rank s
+    LEFT JOIN public.user_project_notifications upn
+        ON upn.user_id = c.user_id AND upn.project_id = p_project_id
+    LEFT JOIN public.notification_preferences np
+        ON np.user_id = c.user_id
+    WHERE CASE
+        -- Per-project settings
+        WHEN upn.id IS NOT NULL THEN
+            upn.email_enabled
+            AND CASE WHEN p_is_resolved THEN upn.email_on_resolved ELSE upn.email_on_active END
+            AND s.alarm_level >= CASE upn.email_min_severity
+                WHEN 'info' THEN 1 WHEN 'warning' THEN 2 WHEN 'minor' THEN 3
+                WHEN 'major' THEN 4 WHEN 'critical' THEN 5 ELSE 0
+            END
+        -- Global settings have no resolved trigger
+        WHEN p_is_resolved THEN false
+        WHEN np.id IS NULL THEN p_severity = 'critical'
+        ELSE
+            np.in_app_enabled
+            AND CASE p_severity
+                WHEN 'critical' THEN np.in_app_critical
+                WHEN 'major' THEN np.in_app_warning
+                WHEN 'warning' THEN np.in_app_warning
+                ELSE np.in_app_info
+            END
+    END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.get_alarm_recipients(UUID, TEXT, BOOLEAN) TO service_role;